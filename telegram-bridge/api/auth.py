@@ -5,7 +5,7 @@ import os
 import jwt
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Annotated, Optional
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -141,6 +141,10 @@ async def require_auth(
     return user
 
 
+# Shared dependency declaration for routes that need the authenticated username
+AuthUser = Annotated[str, Depends(require_auth)]
+
+
 async def require_bearer(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
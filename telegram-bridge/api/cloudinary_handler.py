@@ -7,10 +7,13 @@ Handles image uploads to Cloudinary cloud storage and local reference files.
 """
 import os
 import re
+import hashlib
 import logging
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from threading import Lock
+from typing import Dict, Any, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +23,68 @@ MAX_FILE_SIZE = int(os.getenv('MAX_UPLOAD_SIZE_MB', '10')) * 1024 * 1024
 # Reference directory for local image files (relative to project_dir)
 REFERENCE_DIR = "reference"
 
+# (session_id, content digest) -> [Cloudinary upload result, times handed out],
+# so the same image pasted again in a session reuses the stored asset instead
+# of re-uploading. The count keeps one attachment removal from deleting an
+# asset another message still shows.
+UPLOAD_CACHE_MAX_ENTRIES = 1024
+_upload_cache: "OrderedDict[Tuple[str, str], List[Any]]" = OrderedDict()
+_upload_cache_lock = Lock()
+
+
+def content_digest(content: bytes) -> str:
+    """Hash of file bytes used as the upload dedup key"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def get_cached_upload(session_id: str, digest: str) -> Optional[Dict[str, Any]]:
+    """Reuse a previous upload of identical content in the same session"""
+    key = (session_id, digest)
+    with _upload_cache_lock:
+        entry = _upload_cache.get(key)
+        if entry is None:
+            return None
+        entry[1] += 1
+        _upload_cache.move_to_end(key)
+        return entry[0]
+
+
+def remember_upload(session_id: str, digest: str, result: Dict[str, Any]):
+    """Record an upload result for dedup, evicting the least recently used"""
+    with _upload_cache_lock:
+        _upload_cache[(session_id, digest)] = [result, 1]
+        _upload_cache.move_to_end((session_id, digest))
+        while len(_upload_cache) > UPLOAD_CACHE_MAX_ENTRIES:
+            _upload_cache.popitem(last=False)
+
+
+def forget_uploads(public_id: Optional[str] = None, session_id: Optional[str] = None):
+    """Drop cached uploads whose Cloudinary asset or session was deleted"""
+    with _upload_cache_lock:
+        stale = [
+            key for key, (result, _) in _upload_cache.items()
+            if (public_id is not None and result.get('public_id') == public_id)
+            or (session_id is not None and key[0] == session_id)
+        ]
+        for key in stale:
+            del _upload_cache[key]
+
+
+def release_upload(public_id: str) -> bool:
+    """
+    Drop one use of a deduplicated upload.
+    
+    Returns True if other uses remain and the asset must be kept.
+    """
+    with _upload_cache_lock:
+        for entry in _upload_cache.values():
+            if entry[0].get('public_id') == public_id:
+                if entry[1] > 1:
+                    entry[1] -= 1
+                    return True
+                return False
+    return False
+
 
 def configure_cloudinary() -> bool:
     """Configure Cloudinary with credentials from environment"""
@@ -154,6 +219,7 @@ def delete_from_cloudinary(public_id: str) -> bool:
         success = result.get('result') == 'ok'
         
         if success:
+            forget_uploads(public_id=public_id)
             logger.info(f"Deleted from Cloudinary: {public_id}")
         else:
             logger.warning(f"Failed to delete: {public_id}")
@@ -207,6 +273,7 @@ def delete_session_images(session_id: str) -> int:
     """Delete all images for a session from Cloudinary and database"""
     images = get_session_images(session_id)
     deleted_count = 0
+    forget_uploads(session_id=session_id)
     
     for img in images:
         if delete_from_cloudinary(img["public_id"]):
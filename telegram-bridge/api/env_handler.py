@@ -32,6 +32,27 @@ SENSITIVE_VARS = ["AUTH_PASSWORD"]
 # Track if env has been modified since server start
 _env_dirty = False
 
+# Bumped by every update_env_file(): mtime granularity can hide a quick rewrite
+_write_generation = 0
+
+# (file mtime, managed vars) from the last .env parse
+_managed_env_cache: Optional[tuple] = None
+
+# Default values for managed variables
+ENV_DEFAULTS = {
+    "WEB_UI_URL": "http://localhost:3000",
+    "AUTH_USERNAME": "admin",
+    "AUTH_PASSWORD": "",
+    "JWT_EXPIRY_HOURS": "24",
+    "DEFAULT_TIMEOUT": "60",
+    "PERMISSION_TIMEOUT": "300",
+    "NOTIFY_TIMEOUT": "30",
+    "TELEGRAM_TASK_RESULT_MAX_LENGTH": "0",
+    "LOG_LEVEL": "INFO",
+    "ENABLE_DIRECTORY_BROWSER": "true",
+    "MAX_UPLOAD_SIZE_MB": "10",
+}
+
 
 def get_env_dirty() -> bool:
     """Check if environment has been modified since server start"""
@@ -75,8 +96,29 @@ def read_env_file() -> dict:
     return env_vars
 
 
+def _env_file_mtime() -> Optional[int]:
+    try:
+        return ENV_FILE_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_env_version() -> tuple:
+    """Cheap change marker for the /config/env payload (file mtime, dirty flag, write count)"""
+    return (_env_file_mtime(), _env_dirty, _write_generation)
+
+
 def get_managed_env() -> dict:
-    """Get managed environment variables with sensitive values masked"""
+    """Get managed environment variables (cached until the .env file changes)"""
+    global _managed_env_cache
+    mtime = _env_file_mtime()
+    if _managed_env_cache is None or _managed_env_cache[0] != mtime:
+        _managed_env_cache = (mtime, _read_managed_env())
+    return dict(_managed_env_cache[1])
+
+
+def _read_managed_env() -> dict:
+    """Parse managed environment variables with sensitive values masked"""
     all_vars = read_env_file()
     
     result = {}
@@ -97,7 +139,7 @@ def get_managed_env() -> dict:
 
 def update_env_file(updates: dict) -> bool:
     """Update .env file with new values, preserving comments and unmanaged variables"""
-    global _env_dirty
+    global _env_dirty, _managed_env_cache, _write_generation
     
     # Read existing file content
     lines = []
@@ -154,6 +196,8 @@ def update_env_file(updates: dict) -> bool:
             f.writelines(new_lines)
         
         _env_dirty = True
+        _managed_env_cache = None
+        _write_generation += 1
         logger.info(f"Updated .env file with variables: {list(updates.keys())}")
         return True
     except Exception as e:
@@ -163,16 +207,4 @@ def update_env_file(updates: dict) -> bool:
 
 def get_env_defaults() -> dict:
     """Get default values for managed variables"""
-    return {
-        "WEB_UI_URL": "http://localhost:3000",
-        "AUTH_USERNAME": "admin",
-        "AUTH_PASSWORD": "",
-        "JWT_EXPIRY_HOURS": "24",
-        "DEFAULT_TIMEOUT": "60",
-        "PERMISSION_TIMEOUT": "300",
-        "NOTIFY_TIMEOUT": "30",
-        "TELEGRAM_TASK_RESULT_MAX_LENGTH": "0",
-        "LOG_LEVEL": "INFO",
-        "ENABLE_DIRECTORY_BROWSER": "true",
-        "MAX_UPLOAD_SIZE_MB": "10",
-    }
+    return ENV_DEFAULTS
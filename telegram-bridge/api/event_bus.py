@@ -0,0 +1,178 @@
+"""
+Socket.IO event bus - per-client outbound queues with batched sends
+
+Handlers publish events without awaiting the socket. Each connected client
+has its own bounded queue and a long-lived sender task that drains whatever
+has accumulated into one "batch" frame, so request latency no longer depends
+on how many clients are connected or how fast they read. The Web UI unpacks
+batches and dispatches each event to the regular listeners.
+
+Large state snapshots are deflated once per publish and carried as a binary
+"z" attachment instead of "data", so the same compressed bytes go to every
+client (websocket per-message deflate is disabled in server.py).
+"""
+import asyncio
+import logging
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Per-client queue bound and max events merged into one frame
+MAX_PENDING_EVENTS = 1024
+MAX_BATCH_SIZE = 64
+
+# State snapshots where a newer event supersedes an older one for the same session,
+# so a full queue may drop the older copy instead of dropping the client
+COALESCABLE_EVENTS = frozenset({"sessions_update", "queue_updated", "queue_changed"})
+
+# Events whose payloads can grow large; compressed when at least COMPRESS_MIN_BYTES
+COMPRESSED_EVENTS = frozenset({"sessions_update", "queue_updated", "chat_updated"})
+COMPRESS_MIN_BYTES = 1024
+
+# Window for publish_debounced: repeat calls inside it collapse into one event
+DEBOUNCE_SECONDS = 0.05
+
+# Queue entry: (coalescing key or None, wire item)
+QueuedEvent = Tuple[Optional[Tuple[str, Optional[str]]], Dict[str, Any]]
+
+
+@dataclass
+class ClientChannel:
+    """Outbound queue and sender task for one Socket.IO client"""
+    events: Deque[QueuedEvent] = field(default_factory=deque)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+
+_sio = None
+_clients: Dict[str, ClientChannel] = {}
+_background_tasks: Set[asyncio.Task] = set()
+# event -> (payload object, wire item) of the last compressed publish. Session
+# snapshots come from SessionRegistry.get_all_dumped(), which hands out one
+# shared list per state version, so re-publishing it reuses the deflated bytes.
+_encoded_cache: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+# event -> timer of a pending publish_debounced flush
+_pending_flushes: Dict[str, asyncio.TimerHandle] = {}
+
+
+def session_room(session_id: str) -> str:
+    """Room joined by clients viewing a session (via the subscribe event)"""
+    return f"session:{session_id}"
+
+
+def bind(sio):
+    """Bind the Socket.IO server events are sent through"""
+    global _sio
+    _sio = sio
+
+
+def add_client(sid: str):
+    """Create the outbound queue and sender task for a connected client"""
+    channel = ClientChannel()
+    channel.task = asyncio.get_running_loop().create_task(_send_loop(sid, channel))
+    _clients[sid] = channel
+
+
+def remove_client(sid: str):
+    """Drop a disconnected client's queue and stop its sender task"""
+    channel = _clients.pop(sid, None)
+    if channel and channel.task:
+        channel.task.cancel()
+
+
+def publish(event: str, data: Any, room: Optional[str] = None):
+    """Queue an event for every client (room=None) or every member of a room (or a single sid)"""
+    if _sio is None or not _clients:
+        return
+    if room is None:
+        sids = list(_clients)
+    else:
+        sids = [sid for sid, _ in _sio.manager.get_participants("/", room)]
+
+    entry = (_coalesce_key(event, data), _encode(event, data))
+    for sid in sids:
+        channel = _clients.get(sid)
+        if channel:
+            _enqueue(sid, channel, entry)
+
+
+def publish_debounced(event: str, build: Callable[[], Any], delay: float = DEBOUNCE_SECONDS):
+    """
+    Publish build() to every client once, `delay` seconds after the first call.
+    Calls made while a flush is pending are absorbed; the payload is built at
+    flush time so it carries the latest state.
+    """
+    if event in _pending_flushes:
+        return
+    _pending_flushes[event] = asyncio.get_running_loop().call_later(delay, _flush_debounced, event, build)
+
+
+def _flush_debounced(event: str, build: Callable[[], Any]):
+    _pending_flushes.pop(event, None)
+    publish(event, build())
+
+
+def _coalesce_key(event: str, data: Any) -> Optional[Tuple[str, Optional[str]]]:
+    """(event, session_id) for state snapshots a newer copy supersedes, else None"""
+    if event not in COALESCABLE_EVENTS:
+        return None
+    return (event, data.get("session_id") if isinstance(data, dict) else None)
+
+
+def _encode(event: str, data: Any) -> Dict[str, Any]:
+    """Wire item for a batch frame, deflating large snapshot payloads once"""
+    if event in COMPRESSED_EVENTS:
+        cached = _encoded_cache.get(event)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        body = orjson.dumps(data)
+        if len(body) >= COMPRESS_MIN_BYTES:
+            item = {"event": event, "z": zlib.compress(body, 1)}
+        else:
+            item = {"event": event, "data": data}
+        _encoded_cache[event] = (data, item)
+        return item
+    return {"event": event, "data": data}
+
+
+def _enqueue(sid: str, channel: ClientChannel, entry: QueuedEvent):
+    """Append to a client's queue, applying backpressure when it is full"""
+    if len(channel.events) >= MAX_PENDING_EVENTS:
+        if entry[0] is None or not _drop_superseded(channel, entry[0]):
+            # Client cannot keep up and the event must not be lost
+            logger.warning("Disconnecting slow client %s (%d events pending)", sid, len(channel.events))
+            remove_client(sid)
+            task = asyncio.get_running_loop().create_task(_sio.disconnect(sid))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+            return
+    channel.events.append(entry)
+    channel.ready.set()
+
+
+def _drop_superseded(channel: ClientChannel, key: Tuple[str, Optional[str]]) -> bool:
+    """Remove the oldest queued copy of the same state event; False if none"""
+    for index, (queued_key, _) in enumerate(channel.events):
+        if queued_key == key:
+            del channel.events[index]
+            return True
+    return False
+
+
+async def _send_loop(sid: str, channel: ClientChannel):
+    """Send queued events to one client, merging up to MAX_BATCH_SIZE per frame"""
+    events = channel.events
+    while True:
+        await channel.ready.wait()
+        channel.ready.clear()
+        while events:
+            batch = [events.popleft()[1] for _ in range(min(MAX_BATCH_SIZE, len(events)))]
+            try:
+                await _sio.emit("batch", batch, to=sid)
+            except Exception as e:
+                logger.error("Failed to emit batch of %d events to %s: %s", len(batch), sid, e)
@@ -19,6 +19,33 @@ def get_factory_config_path() -> Optional[str]:
     return os.getenv("FACTORY_CUSTOM_MODEL_CONFIG_PATH")
 
 
+# Bumped by every successful models write: mtime granularity can hide a quick rewrite
+_write_generation = 0
+
+
+def _bump_write_generation() -> None:
+    global _write_generation
+    _write_generation += 1
+
+
+def _file_mtime(path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_models_version() -> tuple:
+    """Cheap change marker for get_all_models (config paths, file mtimes and write count)."""
+    config_path = get_factory_config_path()
+    return (
+        _file_mtime(DEFAULT_MODELS_PATH),
+        config_path,
+        _file_mtime(config_path) if config_path else None,
+        _write_generation,
+    )
+
+
 def read_default_models() -> dict:
     """Read default models configuration."""
     try:
@@ -44,6 +71,7 @@ def write_default_models(config: dict) -> bool:
         DEFAULT_MODELS_PATH.parent.mkdir(parents=True, exist_ok=True)
         with open(DEFAULT_MODELS_PATH, "w", encoding="utf-8") as f:
             json.dump(config, f, indent=2)
+        _bump_write_generation()
         return True
     except Exception as e:
         logger.error(f"Failed to write default models config: {e}")
@@ -91,6 +119,7 @@ def write_custom_models(models: list) -> bool:
         with open(path, "w", encoding="utf-8") as f:
             json.dump(config, f, indent="\t")
         
+        _bump_write_generation()
         return True
     except Exception as e:
         logger.error(f"Failed to write Factory CLI config: {e}")
@@ -3,11 +3,21 @@ FastAPI REST API routes for the bridge server
 """
 import os
 import sys
+import hmac
+import hashlib
+import time
 import uuid
+import ctypes
 import asyncio
 import logging
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Request, Depends, Header, UploadFile, File, Form
+import platform
+import string
+from collections import OrderedDict
+from pathlib import Path
+from typing import Annotated, List, Literal, Optional
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response, Depends, Header, Query, UploadFile, File, Form
+from fastapi.responses import ORJSONResponse
 
 # Get config from environment
 TELEGRAM_TASK_RESULT_MAX_LENGTH = int(os.getenv("TELEGRAM_TASK_RESULT_MAX_LENGTH", "0"))
@@ -15,12 +25,13 @@ WEB_UI_URL = os.getenv("WEB_UI_URL", "http://localhost:3000")
 
 from core.session_registry import session_registry
 from core.message_queue import message_queue
-from core.task_executor import task_executor
-from core.repositories import get_permission_repo, get_task_repo, get_event_repo, get_chat_repo, get_settings_repo, get_session_repo
+from core.task_executor import task_executor, TaskResult
+from core.repositories import get_permission_repo, get_task_repo, get_event_repo, get_chat_repo, get_settings_repo, get_session_repo, get_notification_repo, get_permission_rules_repo, get_history_version
 from core.models import (
     Session,
     SessionStatus,
     PendingRequest,
+    Notification,
     NotificationType,
     RegisterSessionRequest,
     UpdateSessionRequest,
@@ -28,8 +39,9 @@ from core.models import (
     WaitRequest,
     WaitResponse,
     RespondRequest,
+    ResponseQueryRequest,
+    SessionOpResponse,
     HealthResponse,
-    Button,
     TaskExecuteRequest,
     TaskResponse
 )
@@ -38,42 +50,293 @@ from api.auth import (
     verify_token,
     verify_credentials,
     verify_api_key,
-    require_auth,
+    AuthUser,
     require_bearer,
     require_api_key,
     get_bridge_secret,
 )
+from api.cloudinary_handler import (
+    delete_session_images, upload_to_cloudinary, save_image_record, save_to_local, delete_from_cloudinary,
+    content_digest, get_cached_upload, remember_upload, release_upload, cleanup_local_file
+)
+from api.settings_handler import get_settings_summary, get_settings_version, write_settings, validate_settings
+from api.models_handler import (
+    get_all_models, get_models_version, get_factory_config_path,
+    add_default_model, update_default_model, delete_default_model, set_default_model_selection,
+    add_custom_model, update_custom_model, delete_custom_model
+)
+from api.env_handler import (
+    MANAGED_VARS, SENSITIVE_VARS, get_managed_env, get_env_defaults, get_env_version,
+    get_env_dirty, set_env_dirty, update_env_file
+)
+from api import event_bus
+from api.event_bus import publish, session_room
 
 logger = logging.getLogger(__name__)
 
+# Repository singletons, resolved once instead of per request
+_permission_repo = get_permission_repo()
+_permission_rules_repo = get_permission_rules_repo()
+_task_repo = get_task_repo()
+_event_repo = get_event_repo()
+_chat_repo = get_chat_repo()
+_settings_repo = get_settings_repo()
+_session_repo = get_session_repo()
+_notification_repo = get_notification_repo()
+
+# Bridge secret is fixed for the process lifetime (.env is loaded before this module)
+_BRIDGE_SECRET = get_bridge_secret().encode()
+
 # Two routers for organizational separation
 # web_router: General endpoints (Web UI and shared)
 # hooks_router: CLI hook endpoints (mounted at /hooks prefix)
 # Auth is handled by middleware (accepts both Bearer tokens and API keys)
-web_router = APIRouter()
-hooks_router = APIRouter(prefix="/hooks")
+# Responses are serialized with orjson
+web_router = APIRouter(default_response_class=ORJSONResponse)
+hooks_router = APIRouter(prefix="/hooks", default_response_class=ORJSONResponse)
+
+
+async def _require_session(session_id: str) -> Session:
+    """Dependency: the session named by the path's session_id, or 404"""
+    session = await asyncio.to_thread(session_registry.get, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
+# Resolved once per request (FastAPI caches dependencies within a request)
+SessionDep = Annotated[Session, Depends(_require_session)]
+
+# Telegram bot manager, set by server.py's lifespan (None when the bot is unavailable)
+_bot_manager = None
+
+# (timestamp, drives) from the last Windows drive probe
+DRIVES_CACHE_TTL = 30
+_drives_cache: Optional[tuple] = None
+
+# GET /sessions body, keyed by (session state version, queue counts)
+_sessions_list_cache: Optional[tuple] = None
+
+# Serialized /health body, keyed by (session state version, bot connected)
+_health_cache: Optional[tuple] = None
+
+# Pending debounced queue_updated broadcasts: session_id -> timer. Bursts inside
+# the window collapse into one event carrying the state at flush time
+# (sessions_update is debounced by event_bus.publish_debounced).
+BROADCAST_DEBOUNCE_SECONDS = event_bus.DEBOUNCE_SECONDS
+_pending_queue_updates: "dict[str, asyncio.TimerHandle]" = {}
+_broadcast_tasks: "set[asyncio.Task]" = set()
+
+# Queued messages picked up by /queue/process run on a fixed pool of worker
+# tasks instead of one new task per message
+QUEUE_WORKER_COUNT = 4
+_queue_jobs: Optional[asyncio.Queue] = None
+_queue_workers: List[asyncio.Task] = []
+
+# Read-mostly config GETs: endpoint -> (change marker, JSON body, ETag)
+_config_response_cache: dict = {}
+
+# Upper bound for ?limit= on history lists; each page is built in memory
+MAX_HISTORY_LIMIT = 500
+
+# Process-unique ETag prefix so validators from before a restart never match
+_ETAG_EPOCH = uuid.uuid4().hex[:8]
+
+# Session IDs whose CLI is currently thinking -> time marked (in-memory, ephemeral).
+# Bounded and expiring so sessions that vanish mid-prompt do not leak entries.
+CLI_THINKING_MAX_ENTRIES = 10_000
+CLI_THINKING_TTL = 3600
+cli_thinking_sessions: "OrderedDict[str, float]" = OrderedDict()
+
+
+def _mark_cli_thinking(session_id: str):
+    """Record that the CLI started processing a prompt for a session"""
+    cli_thinking_sessions[session_id] = time.monotonic()
+    cli_thinking_sessions.move_to_end(session_id)
+    while len(cli_thinking_sessions) > CLI_THINKING_MAX_ENTRIES:
+        cli_thinking_sessions.popitem(last=False)
+
+
+def _clear_cli_thinking(session_id: str):
+    """Record that the CLI finished (or the session went away)"""
+    cli_thinking_sessions.pop(session_id, None)
+
+
+def _is_cli_thinking(session_id: str) -> bool:
+    """Whether the CLI is thinking for a session, expiring stale entries"""
+    marked_at = cli_thinking_sessions.get(session_id)
+    if marked_at is None:
+        return False
+    if time.monotonic() - marked_at > CLI_THINKING_TTL:
+        del cli_thinking_sessions[session_id]
+        return False
+    return True
+
+
+def set_sio(sio):
+    """Bind the Socket.IO server used for broadcasts"""
+    event_bus.bind(sio)
+
 
-# Track CLI thinking state per session (in-memory, ephemeral)
-cli_thinking_state: dict[str, bool] = {}
+async def _publish_queue_update(session_id: str):
+    queue = await asyncio.to_thread(session_registry.get_queued_messages, session_id)
+    # Full queue only to clients viewing the session; everyone else (the
+    # sidebar's queue counts) just hears that it changed
+    publish("queue_updated", {"session_id": session_id, "queue": queue}, room=session_room(session_id))
+    publish("queue_changed", {"session_id": session_id})
+
+
+def _flush_queue_update(session_id: str):
+    _pending_queue_updates.pop(session_id, None)
+    # The queue is read in a worker thread; keep a reference until it is published
+    task = asyncio.get_running_loop().create_task(_publish_queue_update(session_id))
+    _broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_tasks.discard)
+
+
+def _schedule_queue_update(session_id: str):
+    """Queue one queue_updated broadcast for a session, coalescing bursts"""
+    if session_id in _pending_queue_updates:
+        return
+    _pending_queue_updates[session_id] = asyncio.get_running_loop().call_later(
+        BROADCAST_DEBOUNCE_SECONDS, _flush_queue_update, session_id
+    )
+
+
+def _schedule_sessions_update():
+    """Queue one sessions_update broadcast, coalescing bursts"""
+    event_bus.publish_debounced("sessions_update", session_registry.get_all_dumped)
+
+
+def _session_success_response(session: Session) -> Response:
+    """
+    SessionOpResponse body with the session serialized by pydantic-core directly.
+    Routes declare response_model=SessionOpResponse for the schema; returning a
+    Response skips FastAPI's re-validation of the model.
+    """
+    return Response(
+        content=b'{"success":true,"session":' + session.model_dump_json().encode() + b'}',
+        media_type="application/json"
+    )
+
+
+def _cached_json_response(request: Request, key: str, version, build) -> Response:
+    """
+    Serve a JSON body serialized once per `version`, answering a matching
+    If-None-Match with 304. Responses carry an ETag and Cache-Control: no-cache
+    so clients revalidate instead of showing stale config after an edit.
+    """
+    cached = _config_response_cache.get(key)
+    if cached is None or cached[0] != version:
+        body = orjson.dumps(build())
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        cached = (version, body, etag)
+        _config_response_cache[key] = cached
+    
+    headers = {"ETag": cached[2], "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == cached[2]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached[1], media_type="application/json", headers=headers)
+
+
+async def _run_queue_task(task_id: str, message: dict, session):
+    """Execute one dequeued message and broadcast its outcome"""
+    session_id = session.id
+    try:
+        result = await task_executor.execute_task(
+            task_id=task_id,
+            prompt=message['content'],
+            project_dir=session.project_dir,
+            session_id=session_id,
+            source="queue"
+        )
+        # Emit completion
+        publish("task_completed", {
+            "session_id": session_id,
+            "task_id": task_id,
+            "success": result.success,
+            "result": result.result
+        })
+    except Exception as e:
+        logger.error(f"Queue task execution failed: {e}")
+        publish("task_error", {
+            "session_id": session_id,
+            "task_id": task_id,
+            "error": str(e)
+        })
+
+
+async def _queue_worker(jobs: asyncio.Queue):
+    """Long-lived consumer for queued-message tasks"""
+    while True:
+        job = await jobs.get()
+        try:
+            await _run_queue_task(*job)
+        finally:
+            jobs.task_done()
+
+
+def _enqueue_queue_task(task_id: str, message: dict, session):
+    """Queue a dequeued message for execution, starting the workers on first use"""
+    global _queue_jobs
+    if _queue_jobs is None:
+        _queue_jobs = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        _queue_workers.extend(
+            loop.create_task(_queue_worker(_queue_jobs)) for _ in range(QUEUE_WORKER_COUNT)
+        )
+    _queue_jobs.put_nowait((task_id, message, session))
 
 
-def verify_secret(x_bridge_secret: Optional[str] = Header(None)):
+def _history_etag() -> str:
+    """Validator for history reads: changes with any event/task write or session/permission change"""
+    return f'"{_ETAG_EPOCH}-{get_history_version()}-{session_registry.version}"'
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already has this ETag, else tag the response"""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return None
+
+
+def set_bot_manager(bot_manager):
+    """Bind the TelegramBotManager used for notifications (None to unbind)"""
+    global _bot_manager
+    _bot_manager = bot_manager
+
+
+def _verify_secret(x_bridge_secret: Optional[str] = Header(None)):
     """Verify the bridge secret header"""
-    secret = get_bridge_secret()
-    if secret and x_bridge_secret != secret:
+    if not hmac.compare_digest((x_bridge_secret or "").encode(), _BRIDGE_SECRET):
         raise HTTPException(status_code=401, detail="Invalid bridge secret")
     return True
 
 
+def _secret_not_required():
+    """No bridge secret configured: nothing to check, no header to parse"""
+    return True
+
+
+verify_secret = _verify_secret if _BRIDGE_SECRET else _secret_not_required
+
+
 @web_router.get("/health", response_model=HealthResponse)
-async def health_check(request: Request):
-    """Health check endpoint"""
-    bot_manager = request.app.state.bot_manager()
-    return HealthResponse(
-        status="healthy",
-        active_sessions=len(session_registry.get_active_sessions()),
-        bot_connected=bot_manager.is_connected if bot_manager else False
-    )
+async def health_check():
+    """Health check endpoint (body is re-serialized only when sessions or bot state change)"""
+    global _health_cache
+    bot_manager = _bot_manager
+    key = (session_registry.version, bot_manager.is_connected if bot_manager else False)
+    if _health_cache is None or _health_cache[0] != key:
+        body = HealthResponse(
+            status="healthy",
+            active_sessions=session_registry.active_session_count(),
+            bot_connected=key[1]
+        ).model_dump_json()
+        _health_cache = (key, body.encode())
+    return Response(content=_health_cache[1], media_type="application/json")
 
 
 @web_router.get("/config/project-dirs")
@@ -97,7 +360,7 @@ async def get_project_dirs():
 async def login(request: Request):
     """Login with username and password, returns JWT token"""
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
     except:
         raise HTTPException(status_code=400, detail="Invalid JSON body")
     
@@ -116,7 +379,7 @@ async def login(request: Request):
 
 
 @web_router.get("/auth/verify")
-async def verify_auth(request: Request, user: str = Depends(require_auth)):
+async def verify_auth(user: AuthUser):
     """Verify if the current token is valid"""
     return {
         "success": True,
@@ -126,7 +389,7 @@ async def verify_auth(request: Request, user: str = Depends(require_auth)):
 
 
 @web_router.post("/auth/refresh")
-async def refresh_token(request: Request, user: str = Depends(require_auth)):
+async def refresh_token(user: AuthUser):
     """Refresh the JWT token"""
     token = create_token(user)
     return {
@@ -136,8 +399,8 @@ async def refresh_token(request: Request, user: str = Depends(require_auth)):
     }
 
 
-@hooks_router.post("/sessions/register")
-async def register_session(data: RegisterSessionRequest, request: Request):
+@hooks_router.post("/sessions/register", response_model=SessionOpResponse)
+async def register_session(data: RegisterSessionRequest):
     """Register or update a Droid session"""
     session = session_registry.register(
         session_id=data.session_id,
@@ -146,46 +409,44 @@ async def register_session(data: RegisterSessionRequest, request: Request):
     )
     
     # Emit sessions_update
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+    _schedule_sessions_update()
     
-    return {"success": True, "session": session.model_dump(mode='json')}
+    return _session_success_response(session)
 
 
 @web_router.get("/sessions")
 async def get_sessions():
-    """Get all sessions with queue counts"""
-    sessions = session_registry.get_all()
-    result = []
-    for session in sessions:
-        data = session.model_dump(mode='json')
-        data['queue_count'] = session_registry.get_queue_count(session.id)
-        result.append(data)
-    return result
+    """Get all sessions with queue counts (serialized once per state change)"""
+    global _sessions_list_cache
+    version = session_registry.version
+    queue_counts = await asyncio.to_thread(session_registry.get_queue_counts)
+    
+    cached = _sessions_list_cache
+    if cached is None or cached[0] != version or cached[1] != queue_counts:
+        body = orjson.dumps([
+            {**data, 'queue_count': queue_counts.get(data['id'], 0)}
+            for data in session_registry.get_all_dumped()
+        ])
+        cached = (version, queue_counts, body)
+        _sessions_list_cache = cached
+    return Response(content=cached[2], media_type="application/json")
 
 
 @web_router.get("/sessions/{session_id}")
-async def get_session(session_id: str):
+async def get_session(session_id: str, session: SessionDep):
     """Get a single session by ID"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    result = session.model_dump(mode='json')
+    result = dict(session.to_json_dict())
     # Add queue count
-    result['queue_count'] = session_registry.get_queue_count(session_id)
-    return result
+    result['queue_count'] = await asyncio.to_thread(session_registry.get_queue_count, session_id)
+    # Returned as a response so FastAPI skips its jsonable_encoder walk
+    return ORJSONResponse(result)
 
 
-@hooks_router.patch("/sessions/{session_id}")
-async def update_session(session_id: str, data: UpdateSessionRequest, request: Request):
+@hooks_router.patch("/sessions/{session_id}", response_model=SessionOpResponse)
+async def update_session(session_id: str, session: SessionDep, data: UpdateSessionRequest):
     """Update session attributes"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    update_data = data.model_dump(exclude_unset=True)
+    # Only the fields the client sent, kept as models (no dump/re-splat)
+    update_data = {name: getattr(data, name) for name in data.model_fields_set}
     
     # Use update_status for status changes to sync control_state
     if 'status' in update_data:
@@ -197,30 +458,23 @@ async def update_session(session_id: str, data: UpdateSessionRequest, request: R
         session = session_registry.update(session_id, **update_data)
     
     # Emit sessions_update
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
-        
-        # Emit cli_thinking_done when status changes to waiting (CLI finished)
-        if data.status == 'waiting':
-            await sio.emit("cli_thinking_done", {"session_id": session_id})
+    _schedule_sessions_update()
     
-    return {"success": True, "session": session.model_dump(mode='json')}
+    # Emit cli_thinking_done when status changes to waiting (CLI finished)
+    if data.status == 'waiting':
+        publish("cli_thinking_done", {"session_id": session_id}, room=session_room(session_id))
+    
+    return _session_success_response(session)
 
 
-@web_router.patch("/sessions/{session_id}/rename")
-async def rename_session(session_id: str, name: str, request: Request):
+@web_router.patch("/sessions/{session_id}/rename", response_model=SessionOpResponse)
+async def rename_session(session_id: str, session: SessionDep, name: str):
     """Rename a session"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     if not name or not name.strip():
         raise HTTPException(status_code=400, detail="Name cannot be empty")
     
     # Rename in database
-    result = get_session_repo().rename(session_id, name.strip())
+    result = _session_repo.rename(session_id, name.strip())
     if not result:
         raise HTTPException(status_code=500, detail="Failed to rename session")
     
@@ -228,24 +482,15 @@ async def rename_session(session_id: str, name: str, request: Request):
     session = session_registry.get(session_id)
     
     # Emit sessions_update
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+    _schedule_sessions_update()
     
-    return {"success": True, "session": session.model_dump(mode='json')}
+    return _session_success_response(session)
 
 
 @web_router.delete("/sessions/{session_id}")
-async def delete_session(session_id: str, request: Request):
+async def delete_session(session_id: str, session: SessionDep):
     """Delete a session"""
-    # Get session before deleting to access project_dir
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     # Delete images from Cloudinary
-    from .cloudinary_handler import delete_session_images
     delete_session_images(session_id)
     
     # Clear droid exec session for this project (if any)
@@ -258,18 +503,16 @@ async def delete_session(session_id: str, request: Request):
     
     # Cancel any pending waits
     message_queue.cancel_all_waits(session_id)
+    _clear_cli_thinking(session_id)
     
     # Emit sessions_update to notify connected clients
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+    _schedule_sessions_update()
     
     return {"success": True}
 
 
 @hooks_router.post("/sessions/{session_id}/notify")
-async def notify_session(session_id: str, data: NotifyRequest, request: Request):
+async def notify_session(session_id: str, data: NotifyRequest):
     """Send notification to Telegram for a session"""
     session = session_registry.get(session_id)
     if not session:
@@ -281,10 +524,10 @@ async def notify_session(session_id: str, data: NotifyRequest, request: Request)
         )
     
     # Create pending request only for actionable notifications (permission or has buttons)
-    request_id = str(uuid.uuid4())
+    request_id = os.urandom(16).hex()
     needs_action = data.type == NotificationType.PERMISSION or (data.buttons and len(data.buttons) > 0)
     
-    logger.info(f"Notify: type={data.type}, needs_action={needs_action}, buttons={len(data.buttons) if data.buttons else 0}")
+    logger.info("Notify: type=%s, needs_action=%s, buttons=%d", data.type, needs_action, len(data.buttons) if data.buttons else 0)
     
     # Only set pending_request if user action is needed
     if needs_action:
@@ -294,65 +537,65 @@ async def notify_session(session_id: str, data: NotifyRequest, request: Request)
             message=data.message,
             tool_name=data.tool_name,
             tool_input=data.tool_input,
-            buttons=[Button(**b.model_dump()) for b in data.buttons] if data.buttons else []
+            buttons=data.buttons
         )
         session_registry.set_pending_request(session_id, pending)
     else:
         # Clear any existing pending_request for this session (info notifications should clear it)
         session_registry.set_pending_request(session_id, None)
     
-    # Send to Telegram
-    bot_manager = request.app.state.bot_manager()
-    if bot_manager and bot_manager.is_connected:
-        from core.models import Notification
-        notification = Notification(
-            session_id=session_id,
-            session_name=data.session_name,
-            message=data.message,
-            type=data.type,
-            buttons=data.buttons
-        )
-        await bot_manager.send_notification(notification)
-    
-    # Create notification in database for permission requests
-    if data.type == NotificationType.PERMISSION:
-        from core.repositories import get_notification_repo
-        notification_data = get_notification_repo().create(
-            session_id=session_id,
-            notification_type="permission_request",
-            title=data.session_name or session_id[:8],
-            message=f"{data.tool_name}: {data.message[:100]}..." if len(data.message) > 100 else f"{data.tool_name}: {data.message}"
-        )
-    else:
-        notification_data = None
-    
-    # Emit Socket.IO events
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
+    # Web UI event and Telegram message are independent, so the slow Telegram
+    # round trip does not delay the browser notification
+    async def record_and_emit_notification():
+        # Create notification in database for permission requests
+        if data.type == NotificationType.PERMISSION:
+            notification_data = await asyncio.to_thread(
+                _notification_repo.create,
+                session_id=session_id,
+                notification_type="permission_request",
+                title=data.session_name or session_id[:8],
+                message=f"{data.tool_name}: {data.message[:100]}..." if len(data.message) > 100 else f"{data.tool_name}: {data.message}"
+            )
+        else:
+            notification_data = None
+        
+        # Emit Socket.IO events
         emit_data = {
             "session_id": session_id,
             "session_name": data.session_name,
             "message": data.message,
-            "type": data.type.value if hasattr(data.type, 'value') else data.type,
+            "type": data.type.value,
             "request_id": request_id
         }
         if notification_data:
             emit_data["notification_id"] = notification_data.get("id")
-        await sio.emit("notification", emit_data)
+        publish("notification", emit_data)
         # Also emit sessions_update so Web UI refreshes
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+        _schedule_sessions_update()
+    
+    bot_manager = _bot_manager
+    
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(record_and_emit_notification())
+        
+        # Send to Telegram
+        if bot_manager and bot_manager.is_connected:
+            # Fields come from the validated NotifyRequest, so skip re-validation
+            notification = Notification.model_construct(
+                session_id=session_id,
+                session_name=data.session_name,
+                message=data.message,
+                type=data.type,
+                buttons=data.buttons
+            )
+            tg.create_task(bot_manager.send_notification(notification))
     
     return {"success": True, "request_id": request_id}
 
 
 @hooks_router.post("/sessions/{session_id}/wait")
-async def wait_for_response(session_id: str, data: WaitRequest):
+async def wait_for_response(session_id: str, session: SessionDep, data: WaitRequest):
     """Wait for user response (blocking)"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     # Update status to waiting
     session_registry.update_status(session_id, SessionStatus.WAITING)
     
@@ -383,13 +626,21 @@ async def get_pending_response(session_id: str, request_id: str):
     return WaitResponse(response=response, has_response=True)
 
 
+@hooks_router.post("/responses/query")
+async def query_pending_responses(data: ResponseQueryRequest):
+    """Check stored responses for many sessions in one request (keys are "session_id:request_id")"""
+    found = message_queue.get_pending_responses(data.pairs)
+    return {
+        "responses": {
+            f"{session_id}:{request_id}": response
+            for (session_id, request_id), response in found.items()
+        }
+    }
+
+
 @hooks_router.post("/sessions/{session_id}/respond")
-async def respond_to_session(session_id: str, data: RespondRequest, request: Request):
+async def respond_to_session(session_id: str, session: SessionDep, data: RespondRequest):
     """Deliver a response to a waiting session"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     # Deliver response
     success = message_queue.deliver_response(
         session_id=session_id,
@@ -401,12 +652,10 @@ async def respond_to_session(session_id: str, data: RespondRequest, request: Req
     session_registry.update_status(session_id, SessionStatus.RUNNING)
     
     # Emit Socket.IO event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("response_delivered", {
-            "session_id": session_id,
-            "request_id": data.request_id
-        })
+    publish("response_delivered", {
+        "session_id": session_id,
+        "request_id": data.request_id
+    }, room=session_room(session_id))
     
     return {"success": success}
 
@@ -414,14 +663,13 @@ async def respond_to_session(session_id: str, data: RespondRequest, request: Req
 # Task Execution Endpoints (droid exec)
 
 @web_router.post("/tasks/execute", response_model=TaskResponse)
-async def execute_task(data: TaskExecuteRequest, request: Request):
+async def execute_task(data: TaskExecuteRequest):
     """
     Execute a task using droid exec (headless mode).
     Returns immediately with task_id, executes in background.
     Results delivered via WebSocket 'task_completed' event.
     """
     task_id = data.task_id or str(uuid.uuid4())
-    sio = getattr(request.app.state, "sio", None)
     
     # Create/update session immediately so it appears in sidebar
     pending_session_id = data.session_id
@@ -433,11 +681,10 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
     created_pending = False
     if not pending_session_id:
         pending_session_id = task_id  # Use task_id as temporary session_id
-        from pathlib import Path
         session_name = Path(data.project_dir).name or "custom-task"
         try:
-            session_repo = get_session_repo()
-            session_repo.create(
+            await asyncio.to_thread(
+                _session_repo.create,
                 session_id=pending_session_id,
                 name=session_name,
                 project_dir=data.project_dir,
@@ -445,23 +692,20 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
                 control_state="remote_active"
             )
             created_pending = True
-            logger.info(f"Created pending session {pending_session_id} for {data.project_dir}")
+            logger.info("Created pending session %s for %s", pending_session_id, data.project_dir)
             
             # Emit sessions_update so sidebar shows the new session
-            if sio:
-                all_sessions = session_registry.get_all()
-                await sio.emit("sessions_update", [s.model_dump(mode='json') for s in all_sessions])
+            _schedule_sessions_update()
         except Exception as e:
-            logger.error(f"Failed to create pending session: {e}")
+            logger.error("Failed to create pending session: %s", e)
     
     # Notify that task is starting
-    if sio:
-        await sio.emit("task_started", {
-            "task_id": task_id,
-            "project_dir": data.project_dir,
-            "prompt": data.prompt,
-            "session_id": pending_session_id
-        })
+    publish("task_started", {
+        "task_id": task_id,
+        "project_dir": data.project_dir,
+        "prompt": data.prompt,
+        "session_id": pending_session_id
+    }, room=session_room(pending_session_id))
     
     # Determine which session_id to use for droid exec
     droid_session_id = None
@@ -469,10 +713,7 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
         session = session_registry.get(data.session_id)
         if session and session.status in ('running', 'waiting'):
             droid_session_id = data.session_id
-            logger.info(f"Continuing CLI session {droid_session_id} via Web UI")
-    
-    # Get bot_manager for later use in background task
-    bot_manager_getter = getattr(request.app.state, "bot_manager", None)
+            logger.info("Continuing CLI session %s via Web UI", droid_session_id)
     
     # Background task to execute droid with real-time streaming
     async def run_task_in_background():
@@ -494,12 +735,12 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
                 event_type = event.get("type")
                 
                 # Emit activity events to frontend
-                if sio and event_type in ("message", "tool_call", "tool_result"):
-                    await sio.emit("task_activity", {
+                if event_type in ("message", "tool_call", "tool_result"):
+                    publish("task_activity", {
                         "task_id": task_id,
                         "session_id": pending_session_id,
                         "event": event
-                    })
+                    }, room=session_room(pending_session_id))
                 
                 # Capture completion event
                 if event_type == "completion":
@@ -512,7 +753,6 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
             
             # Use captured data if task result not available
             if not result:
-                from core.task_executor import TaskResult
                 result = TaskResult(
                     success=True,
                     result=final_result or "",
@@ -523,116 +763,120 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
             # delete the pending one and create/update the real one
             if created_pending and result.session_id and result.session_id != pending_session_id:
                 try:
-                    session_repo = get_session_repo()
                     # Delete pending session
-                    session_repo.delete(pending_session_id)
+                    await asyncio.to_thread(_session_repo.delete, pending_session_id)
                     
                     # Create or update the real session
-                    from pathlib import Path
                     session_name = Path(data.project_dir).name or "custom-task"
-                    existing = session_repo.get(result.session_id)
+                    existing = await asyncio.to_thread(_session_repo.get, result.session_id)
                     if not existing:
-                        session_repo.create(
+                        await asyncio.to_thread(
+                            _session_repo.create,
                             session_id=result.session_id,
                             name=session_name,
                             project_dir=data.project_dir,
                             status="running",
                             control_state="remote_active"
                         )
-                        logger.info(f"Created real session {result.session_id} for {data.project_dir}")
+                        logger.info("Created real session %s for %s", result.session_id, data.project_dir)
                     
-                    logger.info(f"Deleted pending session {pending_session_id}, using real session {result.session_id}")
+                    logger.info("Deleted pending session %s, using real session %s", pending_session_id, result.session_id)
                 except Exception as e:
-                    logger.error(f"Failed to handle session transition: {e}")
+                    logger.error("Failed to handle session transition: %s", e)
             
-            # Create notification for task completion
-            notification_data = None
-            if result.session_id:
-                from core.repositories import get_notification_repo
+            # Notify completion via WebSocket
+            publish("task_completed", {
+                "task_id": task_id,
+                "success": result.success,
+                "result": result.result or "",
+                "session_id": result.session_id,
+                "duration_ms": result.duration_ms,
+                "num_turns": result.num_turns,
+                "error": result.error
+            })
+            
+            # Update sidebar with correct sessions
+            _schedule_sessions_update()
+            
+            # Notification record and Telegram message are independent, so send them concurrently
+            async def record_completion_notification():
                 notification_type = "task_completed" if result.success else "task_failed"
                 session_name = data.project_dir.replace("\\", "/").split("/")[-1]
                 message = data.prompt[:80] + "..." if len(data.prompt) > 80 else data.prompt
-                notification_data = get_notification_repo().create(
+                notification_data = await asyncio.to_thread(
+                    _notification_repo.create,
                     session_id=result.session_id,
                     notification_type=notification_type,
                     title=session_name,
                     message=message
                 )
-            
-            # Notify completion via WebSocket
-            if sio:
-                await sio.emit("task_completed", {
-                    "task_id": task_id,
-                    "success": result.success,
-                    "result": result.result or "",
-                    "session_id": result.session_id,
-                    "duration_ms": result.duration_ms,
-                    "num_turns": result.num_turns,
-                    "error": result.error
-                })
-                
                 # Emit notification event for the notification bell
                 if notification_data:
-                    await sio.emit("notification", notification_data)
-                
-                # Update sidebar with correct sessions
-                all_sessions = session_registry.get_all()
-                await sio.emit("sessions_update", [s.model_dump(mode='json') for s in all_sessions])
+                    publish("notification", notification_data)
             
-            # Send Telegram notification
-            if bot_manager_getter:
-                bot_manager = bot_manager_getter()
-                if bot_manager:
-                    session_url = f"{WEB_UI_URL}/session/{result.session_id}" if result.session_id else None
-                    
-                    result_text = result.result or ""
-                    if TELEGRAM_TASK_RESULT_MAX_LENGTH > 0 and len(result_text) > TELEGRAM_TASK_RESULT_MAX_LENGTH:
-                        result_text = result_text[:TELEGRAM_TASK_RESULT_MAX_LENGTH] + "..."
-                    
-                    result_text = result_text.replace("_", "\\_").replace("*", "\\*").replace("`", "\\`")
-                    
-                    status_emoji = "✅" if result.success else "❌"
-                    project_name = data.project_dir.replace("\\", "/").split("/")[-1]
-                    
-                    message_parts = [
-                        f"{status_emoji} *Task Completed*",
-                        f"📁 Project: `{project_name}`",
-                        f"💬 Prompt: _{data.prompt[:100]}{'...' if len(data.prompt) > 100 else ''}_",
-                        "",
-                        f"📝 *Result:*",
-                        result_text if result_text else "(no output)"
-                    ]
-                    
-                    if session_url:
-                        message_parts.append("")
-                        message_parts.append(f"🔗 [Open in Web UI]({session_url})")
-                    
-                    await bot_manager.send_text("\n".join(message_parts))
+            bot_manager = _bot_manager
+            
+            # Completion is already published: a failed side effect is logged here and
+            # must not fall through to the task-failure path below
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    if result.session_id:
+                        tg.create_task(record_completion_notification())
                     
+                    # Send Telegram notification
+                    if bot_manager:
+                        session_url = f"{WEB_UI_URL}/session/{result.session_id}" if result.session_id else None
+                        
+                        result_text = result.result or ""
+                        if TELEGRAM_TASK_RESULT_MAX_LENGTH > 0 and len(result_text) > TELEGRAM_TASK_RESULT_MAX_LENGTH:
+                            result_text = result_text[:TELEGRAM_TASK_RESULT_MAX_LENGTH] + "..."
+                        
+                        result_text = result_text.replace("_", "\\_").replace("*", "\\*").replace("`", "\\`")
+                        
+                        status_emoji = "✅" if result.success else "❌"
+                        project_name = data.project_dir.replace("\\", "/").split("/")[-1]
+                        
+                        message_parts = [
+                            f"{status_emoji} *Task Completed*",
+                            f"📁 Project: `{project_name}`",
+                            f"💬 Prompt: _{data.prompt[:100]}{'...' if len(data.prompt) > 100 else ''}_",
+                            "",
+                            f"📝 *Result:*",
+                            result_text if result_text else "(no output)"
+                        ]
+                        
+                        if session_url:
+                            message_parts.append("")
+                            message_parts.append(f"🔗 [Open in Web UI]({session_url})")
+                        
+                        tg.create_task(bot_manager.send_text("\n".join(message_parts)))
+            except* Exception as eg:
+                for error in eg.exceptions:
+                    logger.error("Task %s completion notification failed: %s", task_id, error, exc_info=error)
+            
         except Exception as e:
-            logger.error(f"Background task failed: {e}")
+            logger.error("Background task failed: %s", e)
             # Create notification for task error
             error_notification = None
             if pending_session_id:
-                from core.repositories import get_notification_repo
                 session_name = data.project_dir.replace("\\", "/").split("/")[-1]
-                error_notification = get_notification_repo().create(
+                error_notification = await asyncio.to_thread(
+                    _notification_repo.create,
                     session_id=pending_session_id,
                     notification_type="task_failed",
                     title=session_name,
                     message=str(e)[:100]
                 )
             # Notify error via WebSocket
-            if sio:
-                await sio.emit("task_completed", {
-                    "task_id": task_id,
-                    "success": False,
-                    "result": "",
-                    "session_id": pending_session_id,
-                    "error": str(e)
-                })
-                if error_notification:
-                    await sio.emit("notification", error_notification)
+            publish("task_completed", {
+                "task_id": task_id,
+                "success": False,
+                "result": "",
+                "session_id": pending_session_id,
+                "error": str(e)
+            })
+            if error_notification:
+                publish("notification", error_notification)
     
     # Start background task and return immediately
     asyncio.create_task(run_task_in_background())
@@ -647,7 +891,7 @@ async def execute_task(data: TaskExecuteRequest, request: Request):
 
 
 @web_router.post("/tasks/{task_id}/cancel")
-async def cancel_task(task_id: str, request: Request):
+async def cancel_task(task_id: str):
     """Cancel a running task."""
     success = task_executor.cancel_task(task_id)
     
@@ -655,11 +899,9 @@ async def cancel_task(task_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Task not found or not running")
     
     # Notify cancellation
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("task_cancelled", {
-            "task_id": task_id
-        })
+    publish("task_cancelled", {
+        "task_id": task_id
+    })
     
     return {"success": True, "message": "Task cancelled"}
 
@@ -681,44 +923,29 @@ async def clear_project_session(project_dir: str):
 # Queue Management Endpoints
 
 @web_router.get("/sessions/{session_id}/queue")
-async def get_session_queue(session_id: str):
+async def get_session_queue(session_id: str, session: SessionDep):
     """Get queued messages for a session"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    messages = session_registry.get_queued_messages(session_id)
+    messages = await asyncio.to_thread(session_registry.get_queued_messages, session_id)
     return {"session_id": session_id, "messages": messages, "count": len(messages)}
 
 
 @web_router.post("/sessions/{session_id}/queue")
-async def add_to_queue(session_id: str, content: str, source: str = "web", request: Request = None):
+async def add_to_queue(session_id: str, session: SessionDep, content: str, source: str = "web"):
     """Add a message to the queue"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     message = session_registry.queue_message(session_id, content, source)
     
     # Get queue count for notification
     queue_count = session_registry.get_queue_count(session_id)
     
     # Emit queue update event
-    sio = getattr(request.app.state, "sio", None) if request else None
-    if sio:
-        messages = session_registry.get_queued_messages(session_id)
-        await sio.emit("queue_updated", {
-            "session_id": session_id,
-            "queue": messages
-        })
+    _schedule_queue_update(session_id)
     
     # Send Telegram notification
-    from bot.telegram_bot import TelegramBotManager
-    bot = TelegramBotManager.get_instance()
+    bot = _bot_manager
     if bot:
         truncated = content[:50] + "..." if len(content) > 50 else content
         truncated = truncated.replace("_", "\\_").replace("*", "\\*").replace("`", "\\`")
-        await bot.send_notification(
+        await bot.send_text(
             f"⏳ *Task Queued* \\(#{queue_count}\\)\n"
             f"📁 `{session.name}`\n"
             f"💬 _{truncated}_",
@@ -729,51 +956,32 @@ async def add_to_queue(session_id: str, content: str, source: str = "web", reque
 
 
 @web_router.delete("/sessions/{session_id}/queue/{message_id}")
-async def cancel_queued_message(session_id: str, message_id: int, request: Request):
+async def cancel_queued_message(session_id: str, message_id: int):
     """Cancel a specific queued message"""
     success = session_registry.cancel_queued_message(message_id)
     if not success:
         raise HTTPException(status_code=404, detail="Message not found or already processed")
     
     # Emit queue update event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        messages = session_registry.get_queued_messages(session_id)
-        await sio.emit("queue_updated", {
-            "session_id": session_id,
-            "queue": messages
-        })
+    _schedule_queue_update(session_id)
     
     return {"success": True}
 
 
 @web_router.delete("/sessions/{session_id}/queue")
-async def clear_session_queue(session_id: str, request: Request):
+async def clear_session_queue(session_id: str, session: SessionDep):
     """Clear all queued messages for a session"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     count = session_registry.clear_queue(session_id)
     
     # Emit queue update event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("queue_updated", {
-            "session_id": session_id,
-            "queue": []
-        })
+    _schedule_queue_update(session_id)
     
     return {"success": True, "cleared_count": count}
 
 
 @web_router.post("/sessions/{session_id}/queue/send-next")
-async def send_next_queued(session_id: str, request: Request):
+async def send_next_queued(session_id: str, session: SessionDep):
     """Send the next queued message"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     # Check if remote control is active
     if not session_registry.can_execute_remote_task(session_id):
         raise HTTPException(
@@ -800,13 +1008,7 @@ async def send_next_queued(session_id: str, request: Request):
     )
     
     # Emit queue update event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        messages = session_registry.get_queued_messages(session_id)
-        await sio.emit("queue_updated", {
-            "session_id": session_id,
-            "queue": messages
-        })
+    _schedule_queue_update(session_id)
     
     return {
         "success": True,
@@ -820,12 +1022,8 @@ async def send_next_queued(session_id: str, request: Request):
 
 
 @web_router.post("/sessions/{session_id}/queue/process")
-async def process_queue_item(session_id: str, request: Request):
+async def process_queue_item(session_id: str, session: SessionDep):
     """Process next queued message (called by Stop hook when CLI finishes)"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     # Get next message
     message = session_registry.get_next_queued_message(session_id)
     if not message:
@@ -834,48 +1032,12 @@ async def process_queue_item(session_id: str, request: Request):
     # Mark as sent
     session_registry.mark_message_sent(message['id'])
     
-    # Execute the task in background
+    # Hand the task to the queue workers
     task_id = str(uuid.uuid4())
-    
-    # Get socket for emitting events
-    sio = getattr(request.app.state, "sio", None)
-    
-    async def run_task():
-        try:
-            result = await task_executor.execute_task(
-                task_id=task_id,
-                prompt=message['content'],
-                project_dir=session.project_dir,
-                session_id=session_id,
-                source="queue"
-            )
-            # Emit completion
-            if sio:
-                await sio.emit("task_completed", {
-                    "session_id": session_id,
-                    "task_id": task_id,
-                    "success": result.success,
-                    "result": result.result
-                })
-        except Exception as e:
-            logger.error(f"Queue task execution failed: {e}")
-            if sio:
-                await sio.emit("task_error", {
-                    "session_id": session_id,
-                    "task_id": task_id,
-                    "error": str(e)
-                })
-    
-    # Start task in background
-    asyncio.create_task(run_task())
+    _enqueue_queue_task(task_id, message, session)
     
     # Emit queue update event
-    if sio:
-        messages = session_registry.get_queued_messages(session_id)
-        await sio.emit("queue_updated", {
-            "session_id": session_id,
-            "queue": messages
-        })
+    _schedule_queue_update(session_id)
     
     return {
         "success": True,
@@ -889,65 +1051,63 @@ async def process_queue_item(session_id: str, request: Request):
 
 # Control State Endpoints
 
-@web_router.post("/sessions/{session_id}/handoff")
-async def handoff_session(session_id: str, request: Request):
+@web_router.post("/sessions/{session_id}/handoff", response_model=SessionOpResponse)
+async def handoff_session(session_id: str):
     """Hand off control from CLI to remote"""
     session = session_registry.handoff_to_remote(session_id)
     if not session:
         raise HTTPException(status_code=400, detail="Cannot handoff - session not in CLI state")
     
     # Emit state change event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("session_state_changed", {
-            "session_id": session_id,
-            "control_state": session.control_state
-        })
-        # Also emit sessions_update
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+    publish("session_state_changed", {
+        "session_id": session_id,
+        "control_state": session.control_state
+    }, room=session_room(session_id))
+    # Also emit sessions_update
+    _schedule_sessions_update()
     
-    return {"success": True, "session": session.model_dump(mode='json')}
+    return _session_success_response(session)
 
 
-@web_router.post("/sessions/{session_id}/release")
-async def release_session(session_id: str, request: Request):
+@web_router.post("/sessions/{session_id}/release", response_model=SessionOpResponse)
+async def release_session(session_id: str):
     """Release control back to CLI"""
     session = session_registry.release_to_cli(session_id)
     if not session:
         raise HTTPException(status_code=400, detail="Cannot release - session not under remote control")
     
     # Emit state change event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("session_state_changed", {
-            "session_id": session_id,
-            "control_state": session.control_state
-        })
-        # Also emit sessions_update
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+    publish("session_state_changed", {
+        "session_id": session_id,
+        "control_state": session.control_state
+    }, room=session_room(session_id))
+    # Also emit sessions_update
+    _schedule_sessions_update()
     
-    return {"success": True, "session": session.model_dump(mode='json')}
+    return _session_success_response(session)
 
 
 # History and Troubleshooting Endpoints
 
 @web_router.get("/sessions/{session_id}/permissions")
-async def get_permission_history(session_id: str, limit: int = 50):
+async def get_permission_history(session_id: str, session: SessionDep, request: Request, response: Response, limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get permission request history for a session"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
     
-    permissions = get_permission_repo().get_history(session_id=session_id, limit=limit)
+    permissions = await asyncio.to_thread(_permission_repo.get_history, session_id=session_id, limit=limit)
     return {"session_id": session_id, "permissions": permissions}
 
 
 @web_router.get("/permissions")
-async def get_all_permissions(limit: int = 50):
+async def get_all_permissions(request: Request, response: Response, limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get all permission requests (for troubleshooting)"""
-    permissions = get_permission_repo().get_history(limit=limit)
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
+    
+    permissions = await asyncio.to_thread(_permission_repo.get_history, limit=limit)
     return {"permissions": permissions}
 
 
@@ -955,9 +1115,8 @@ async def get_all_permissions(limit: int = 50):
 async def resolve_permission(
     session_id: str, 
     request_id: str, 
-    decision: str, 
-    request: Request,
-    scope: Optional[str] = None
+    decision: Literal["approved", "denied"],
+    scope: Optional[Literal["session", "global"]] = None
 ):
     """
     Resolve a permission request from Web UI.
@@ -966,31 +1125,23 @@ async def resolve_permission(
         decision: "approved" or "denied"
         scope: Optional - "session" or "global" to also create a rule for future requests
     """
-    if decision not in ["approved", "denied"]:
-        raise HTTPException(status_code=400, detail="Decision must be 'approved' or 'denied'")
-    
-    if scope and scope not in ["session", "global"]:
-        raise HTTPException(status_code=400, detail="scope must be 'session' or 'global'")
-    
     # Get the permission request to extract tool info
-    perm_request = get_permission_repo().get_pending(session_id)
+    perm_request = await asyncio.to_thread(_permission_repo.get_pending, session_id)
     
     # Resolve in database
-    perm = get_permission_repo().resolve(request_id, decision, "web")
+    perm = await asyncio.to_thread(_permission_repo.resolve, request_id, decision, "web")
     if not perm:
         raise HTTPException(status_code=404, detail="Permission request not found")
     
     # If scope provided, create a rule for future requests
     rule = None
     if scope and perm_request and perm_request.get('id') == request_id:
-        from core.repositories import get_permission_rules_repo
-        import json
         
         tool_name = perm_request.get('tool_name', '')
         tool_input = perm_request.get('tool_input', '{}')
         
         try:
-            input_dict = json.loads(tool_input) if isinstance(tool_input, str) else tool_input
+            input_dict = orjson.loads(tool_input) if isinstance(tool_input, str) else tool_input
         except:
             input_dict = {}
         
@@ -1003,7 +1154,8 @@ async def resolve_permission(
             pattern = '*'
         
         rule_type = 'allow' if decision == 'approved' else 'deny'
-        rule = get_permission_rules_repo().add(
+        rule = await asyncio.to_thread(
+            _permission_rules_repo.add,
             tool_name=tool_name,
             pattern=pattern,
             rule_type=rule_type,
@@ -1016,48 +1168,53 @@ async def resolve_permission(
     message_queue.deliver_response(session_id, request_id, response)
     
     # Emit event
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("permission_resolved", {
-            "session_id": session_id,
-            "request_id": request_id,
-            "decision": decision
-        })
+    publish("permission_resolved", {
+        "session_id": session_id,
+        "request_id": request_id,
+        "decision": decision
+    }, room=session_room(session_id))
     
     return {"success": True, "permission": perm, "rule": rule}
 
 
 @web_router.get("/sessions/{session_id}/events")
-async def get_session_events(session_id: str, limit: int = 100):
+async def get_session_events(session_id: str, session: SessionDep, request: Request, response: Response, limit: int = Query(100, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get session events for troubleshooting"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
     
-    events = get_event_repo().get_by_session(session_id, limit=limit)
+    events = await asyncio.to_thread(_event_repo.get_by_session, session_id, limit=limit)
     return {"session_id": session_id, "events": events}
 
 
 @web_router.get("/sessions/{session_id}/timeline")
-async def get_session_timeline(session_id: str, limit: int = 50):
+async def get_session_timeline(session_id: str, session: SessionDep, request: Request, response: Response, limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get unified timeline for a session (events, permissions, tasks)"""
-    session = session_registry.get(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
     
-    timeline = get_event_repo().get_timeline(session_id, limit=limit)
+    timeline = await asyncio.to_thread(_event_repo.get_timeline, session_id, limit=limit)
     return {"session_id": session_id, "timeline": timeline}
 
 
 @web_router.get("/tasks")
 async def get_task_history(
+    request: Request,
+    response: Response,
     session_id: Optional[str] = None,
     source: Optional[str] = None,
     success_only: bool = False,
-    limit: int = 50
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT)
 ):
     """Get task execution history"""
-    tasks = get_task_repo().get_history(
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
+    
+    tasks = await asyncio.to_thread(
+        _task_repo.get_history,
         session_id=session_id,
         source=source,
         success_only=success_only,
@@ -1067,19 +1224,21 @@ async def get_task_history(
 
 
 @web_router.get("/tasks/failed")
-async def get_failed_tasks(limit: int = 20):
+async def get_failed_tasks(request: Request, response: Response, limit: int = Query(20, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get failed tasks for troubleshooting"""
-    tasks = get_task_repo().get_failed(limit=limit)
+    not_modified = _not_modified(request, response, _history_etag())
+    if not_modified:
+        return not_modified
+    
+    tasks = await asyncio.to_thread(_task_repo.get_failed, limit=limit)
     return {"tasks": tasks}
 
 
 # Chat History Endpoints
 @web_router.get("/sessions/{session_id}/chat")
-async def get_chat_history(session_id: str, limit: int = 30, offset: int = 0):
+async def get_chat_history(session_id: str, limit: int = Query(30, ge=1, le=MAX_HISTORY_LIMIT), offset: int = 0):
     """Get chat messages for a session (newest first for pagination)"""
-    repo = get_chat_repo()
-    messages = repo.get_by_session_paginated(session_id, limit=limit, offset=offset)
-    total = repo.count_by_session(session_id)
+    messages, total = await asyncio.to_thread(_chat_repo.get_page_with_total, session_id, limit=limit, offset=offset)
     has_more = offset + len(messages) < total
     return {
         "session_id": session_id,
@@ -1094,9 +1253,8 @@ async def get_chat_history(session_id: str, limit: int = 30, offset: int = 0):
 @web_router.post("/sessions/{session_id}/chat")
 async def add_chat_message(
     session_id: str,
-    msg_type: str,
+    msg_type: Literal["user", "assistant"],
     content: str,
-    request: Request,
     status: Optional[str] = None,
     duration_ms: Optional[int] = None,
     num_turns: Optional[int] = None,
@@ -1104,15 +1262,15 @@ async def add_chat_message(
     images: Optional[str] = None  # JSON array of image URLs
 ):
     """Add a chat message"""
-    import json
     images_list = None
     if images:
         try:
-            images_list = json.loads(images)
-        except json.JSONDecodeError:
+            images_list = orjson.loads(images)
+        except orjson.JSONDecodeError:
             pass
     
-    message = get_chat_repo().create(
+    message = await asyncio.to_thread(
+        _chat_repo.create,
         session_id=session_id,
         msg_type=msg_type,
         content=content,
@@ -1125,20 +1283,18 @@ async def add_chat_message(
     
     # Clear thinking state when assistant message is added from CLI
     if msg_type == 'assistant' and source == 'cli':
-        cli_thinking_state[session_id] = False
+        _clear_cli_thinking(session_id)
     
     # Emit WebSocket event so Web UI updates
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("chat_updated", {
-            "session_id": session_id,
-            "message": message
-        })
-        # Also emit explicit cli_thinking_done to ensure thinking state is cleared
-        if msg_type == 'assistant' and source == 'cli':
-            await sio.emit("cli_thinking_done", {
-                "session_id": session_id
-            })
+    publish("chat_updated", {
+        "session_id": session_id,
+        "message": message
+    })
+    # Also emit explicit cli_thinking_done to ensure thinking state is cleared
+    if msg_type == 'assistant' and source == 'cli':
+        publish("cli_thinking_done", {
+            "session_id": session_id
+        }, room=session_room(session_id))
     
     return {"success": True, "message": message}
 
@@ -1146,26 +1302,24 @@ async def add_chat_message(
 @web_router.delete("/sessions/{session_id}/chat")
 async def clear_chat_history(session_id: str):
     """Clear all chat messages for a session"""
-    count = get_chat_repo().clear_session(session_id)
+    count = await asyncio.to_thread(_chat_repo.clear_session, session_id)
     return {"success": True, "deleted": count}
 
 
 @hooks_router.post("/sessions/{session_id}/cli-thinking")
 async def cli_thinking(session_id: str, request: Request):
     """Notify Web UI that CLI is processing a prompt (show thinking indicator)"""
-    body = await request.json()
+    body = orjson.loads(await request.body())
     prompt = body.get("prompt", "")
     
     # Store thinking state so new connections can check it
-    cli_thinking_state[session_id] = True
+    _mark_cli_thinking(session_id)
     
     # Emit WebSocket event so Web UI shows thinking indicator
-    sio = getattr(request.app.state, "sio", None)
-    if sio:
-        await sio.emit("cli_thinking", {
-            "session_id": session_id,
-            "prompt": prompt
-        })
+    publish("cli_thinking", {
+        "session_id": session_id,
+        "prompt": prompt
+    }, room=session_room(session_id))
     
     return {"success": True}
 
@@ -1173,14 +1327,14 @@ async def cli_thinking(session_id: str, request: Request):
 @web_router.get("/sessions/{session_id}/cli-thinking")
 async def get_cli_thinking(session_id: str):
     """Check if CLI is currently thinking for this session"""
-    return {"thinking": cli_thinking_state.get(session_id, False)}
+    return {"thinking": _is_cli_thinking(session_id)}
 
 
 # Session Settings Endpoints
 @web_router.get("/sessions/{session_id}/settings")
 async def get_session_settings(session_id: str):
     """Get settings for a session"""
-    settings = get_settings_repo().get(session_id)
+    settings = await asyncio.to_thread(_settings_repo.get, session_id)
     if not settings:
         # Return defaults
         settings = {
@@ -1200,7 +1354,8 @@ async def update_session_settings(
     autonomy_level: Optional[str] = None
 ):
     """Update settings for a session"""
-    settings = get_settings_repo().upsert(
+    settings = await asyncio.to_thread(
+        _settings_repo.upsert,
         session_id=session_id,
         model=model,
         reasoning_effort=reasoning_effort,
@@ -1223,26 +1378,51 @@ async def upload_image(
         local_path: Relative path for droid exec (e.g., ./reference/image.png)
         url: Cloudinary URL for chat history display
     """
-    from .cloudinary_handler import upload_to_cloudinary, save_image_record, save_to_local
     
     try:
         content = await image.read()
         filename = image.filename or "image.png"
         
-        # Upload to Cloudinary (for chat history)
-        cloudinary_result = upload_to_cloudinary(content, filename, session_id)
-        
-        # Save locally (for droid exec) if project_dir provided
-        local_path = None
-        if project_dir:
+        async def save_local_copy() -> Optional[str]:
+            # Save locally (for droid exec) if project_dir provided
+            if not project_dir:
+                return None
             try:
-                local_path = save_to_local(content, filename, project_dir)
+                return await asyncio.to_thread(save_to_local, content, filename, project_dir)
             except Exception as e:
                 logger.warning(f"Failed to save locally: {e}")
+                return None
+        
+        # Identical bytes already uploaded in this session reuse that asset
+        digest = content_digest(content)
+        cached_result = get_cached_upload(session_id, digest)
+        
+        async def upload_remote_copy() -> dict:
+            if cached_result is not None:
+                return cached_result
+            return await asyncio.to_thread(upload_to_cloudinary, content, filename, session_id)
+        
+        # Cloudinary upload (for chat history) and local save are blocking and
+        # independent: run both in worker threads at the same time. The local
+        # copy is always rewritten since it is cleaned up after each task.
+        cloudinary_result, local_path = await asyncio.gather(
+            upload_remote_copy(),
+            save_local_copy(),
+            return_exceptions=True
+        )
+        if isinstance(cloudinary_result, BaseException):
+            # The client gets no local_path to clean up, so don't leave the copy behind
+            if local_path:
+                await asyncio.to_thread(cleanup_local_file, local_path, project_dir)
+            raise cloudinary_result
         
-        # Save image record for tracking (cleanup on session delete)
-        if session_id != "unknown":
-            save_image_record(session_id, cloudinary_result['public_id'], cloudinary_result['url'])
+        if cached_result is None:
+            remember_upload(session_id, digest, cloudinary_result)
+            # Save image record for tracking (cleanup on session delete)
+            if session_id != "unknown":
+                await asyncio.to_thread(
+                    save_image_record, session_id, cloudinary_result['public_id'], cloudinary_result['url']
+                )
         
         return {
             'success': True,
@@ -1264,16 +1444,19 @@ async def upload_image(
 @web_router.post("/delete-image")
 async def delete_image(request: Request):
     """Delete image from Cloudinary"""
-    from .cloudinary_handler import delete_from_cloudinary
     
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         public_id = data.get('public_id')
         
         if not public_id:
             raise HTTPException(status_code=400, detail='public_id required')
         
-        success = delete_from_cloudinary(public_id)
+        # A deduplicated upload may still back another attachment
+        if release_upload(public_id):
+            return {'success': True}
+        
+        success = await asyncio.to_thread(delete_from_cloudinary, public_id)
         return {'success': success}
     except HTTPException:
         raise
@@ -1286,8 +1469,24 @@ async def delete_image(request: Request):
 @web_router.get("/filesystem/browse")
 async def browse_filesystem(path: Optional[str] = None):
     """Browse filesystem directories for project selection"""
-    import os
-    import platform
+    # Directory scans and drive probes are blocking syscalls; keep them off the event loop
+    return await asyncio.to_thread(_browse_filesystem_sync, path)
+
+
+def _get_windows_drives() -> List[str]:
+    """Present drive roots from the GetLogicalDrives bitmask, cached briefly"""
+    global _drives_cache
+    now = time.monotonic()
+    if _drives_cache is None or now - _drives_cache[0] > DRIVES_CACHE_TTL:
+        # One syscall instead of stat-ing A:..Z:, which can stall on offline network shares
+        mask = ctypes.windll.kernel32.GetLogicalDrives()
+        drives = [f"{letter}:\\" for i, letter in enumerate(string.ascii_uppercase) if mask & (1 << i)]
+        _drives_cache = (now, drives)
+    return _drives_cache[1]
+
+
+def _browse_filesystem_sync(path: Optional[str]) -> dict:
+    """List subdirectories of path (runs in a worker thread)"""
     
     result = {
         "current_path": "",
@@ -1298,13 +1497,7 @@ async def browse_filesystem(path: Optional[str] = None):
     
     # Get available drives on Windows
     if platform.system() == "Windows":
-        import string
-        drives = []
-        for letter in string.ascii_uppercase:
-            drive = f"{letter}:\\"
-            if os.path.exists(drive):
-                drives.append(drive)
-        result["drives"] = drives
+        result["drives"] = _get_windows_drives()
     
     # Default to home directory if no path provided
     if not path:
@@ -1328,23 +1521,24 @@ async def browse_filesystem(path: Optional[str] = None):
     if parent != path:  # Not at root
         result["parent"] = parent
     
-    # List subdirectories
+    # List subdirectories (scandir reuses the file type from the directory read,
+    # so non-symlink entries need no extra stat call)
     try:
-        entries = os.listdir(path)
         directories = []
-        for entry in sorted(entries):
-            # Skip hidden files/folders
-            if entry.startswith('.'):
-                continue
-            full_path = os.path.join(path, entry)
-            try:
-                if os.path.isdir(full_path):
-                    directories.append({
-                        "name": entry,
-                        "path": full_path
-                    })
-            except PermissionError:
-                continue
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # Skip hidden files/folders
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        directories.append({
+                            "name": entry.name,
+                            "path": entry.path
+                        })
+                except PermissionError:
+                    continue
+        directories.sort(key=lambda d: d["name"])
         result["directories"] = directories
     except PermissionError:
         raise HTTPException(status_code=403, detail=f"Permission denied: {path}")
@@ -1357,18 +1551,17 @@ async def browse_filesystem(path: Optional[str] = None):
 @web_router.get("/permissions/rules")
 async def get_permission_rules(scope: Optional[str] = None, session_id: Optional[str] = None):
     """Get permission rules, optionally filtered by scope or session"""
-    from core.repositories import get_permission_rules_repo
-    repo = get_permission_rules_repo()
+    repo = _permission_rules_repo
     
     if session_id:
         # Get merged rules for a session (global + session-specific)
-        rules = repo.get_merged_rules(session_id)
+        rules = await asyncio.to_thread(repo.get_merged_rules, session_id)
     elif scope == 'global':
-        rules = repo.get_global_rules()
+        rules = await asyncio.to_thread(repo.get_global_rules)
     elif scope == 'session' and session_id:
-        rules = repo.get_session_rules(session_id)
+        rules = await asyncio.to_thread(repo.get_session_rules, session_id)
     else:
-        rules = repo.get_all(scope)
+        rules = await asyncio.to_thread(repo.get_all, scope)
     
     return {"rules": rules}
 
@@ -1383,7 +1576,6 @@ async def add_permission_rule(
     description: Optional[str] = None
 ):
     """Add a permission rule"""
-    from core.repositories import get_permission_rules_repo
     
     if rule_type not in ['allow', 'deny']:
         raise HTTPException(status_code=400, detail="rule_type must be 'allow' or 'deny'")
@@ -1392,7 +1584,8 @@ async def add_permission_rule(
     if scope == 'session' and not session_id:
         raise HTTPException(status_code=400, detail="session_id required for session scope")
     
-    rule = get_permission_rules_repo().add(
+    rule = await asyncio.to_thread(
+        _permission_rules_repo.add,
         tool_name=tool_name,
         pattern=pattern,
         rule_type=rule_type,
@@ -1409,8 +1602,7 @@ async def add_permission_rule(
 @web_router.delete("/permissions/rules/{rule_id}")
 async def remove_permission_rule(rule_id: int):
     """Remove a permission rule"""
-    from core.repositories import get_permission_rules_repo
-    success = get_permission_rules_repo().remove(rule_id)
+    success = await asyncio.to_thread(_permission_rules_repo.remove, rule_id)
     if success:
         return {"success": True}
     else:
@@ -1420,34 +1612,33 @@ async def remove_permission_rule(rule_id: int):
 @web_router.get("/sessions/{session_id}/permissions/rules")
 async def get_session_permission_rules(session_id: str):
     """Get all permission rules for a session (merged global + session)"""
-    from core.repositories import get_permission_rules_repo
-    rules = get_permission_rules_repo().get_merged_rules(session_id)
+    rules = await asyncio.to_thread(_permission_rules_repo.get_merged_rules, session_id)
     return {"session_id": session_id, "rules": rules}
 
 
 @web_router.delete("/sessions/{session_id}/permissions/rules")
 async def clear_session_permission_rules(session_id: str):
     """Clear all session-specific permission rules for a session"""
-    from core.repositories import get_permission_rules_repo
-    count = get_permission_rules_repo().clear_session_rules(session_id)
+    count = await asyncio.to_thread(_permission_rules_repo.clear_session_rules, session_id)
     return {"success": True, "deleted": count}
 
 
 # Legacy Allowlist Endpoints (backward compatibility)
 
 @web_router.get("/allowlist")
-async def get_allowlist():
+async def get_allowlist(request: Request):
     """Get all permission rules (legacy endpoint)"""
-    from core.repositories import get_permission_rules_repo
-    rules = get_permission_rules_repo().get_global_rules()
-    return {"rules": rules}
+    repo = _permission_rules_repo
+    return _cached_json_response(
+        request, "allowlist", repo.version,
+        lambda: {"rules": repo.get_global_rules()}
+    )
 
 
 @web_router.post("/allowlist")
 async def add_allowlist_rule(tool_name: str, pattern: str, description: Optional[str] = None):
     """Add a global allow rule (legacy endpoint)"""
-    from core.repositories import get_permission_rules_repo
-    rule = get_permission_rules_repo().add(tool_name, pattern, 'allow', 'global', None, description)
+    rule = await asyncio.to_thread(_permission_rules_repo.add, tool_name, pattern, 'allow', 'global', None, description)
     if rule:
         return {"success": True, "rule": rule}
     else:
@@ -1457,8 +1648,7 @@ async def add_allowlist_rule(tool_name: str, pattern: str, description: Optional
 @web_router.delete("/allowlist/{rule_id}")
 async def remove_allowlist_rule(rule_id: int):
     """Remove a permission rule (legacy endpoint)"""
-    from core.repositories import get_permission_rules_repo
-    success = get_permission_rules_repo().remove(rule_id)
+    success = await asyncio.to_thread(_permission_rules_repo.remove, rule_id)
     if success:
         return {"success": True}
     else:
@@ -1468,11 +1658,12 @@ async def remove_allowlist_rule(rule_id: int):
 # ============ Factory CLI Settings Endpoints ============
 
 @web_router.get("/factory-settings")
-async def get_factory_settings():
+async def get_factory_settings(request: Request):
     """Get Factory CLI settings.json"""
-    from api.settings_handler import get_settings_summary
     try:
-        return get_settings_summary()
+        return _cached_json_response(
+            request, "factory-settings", get_settings_version(), get_settings_summary
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except FileNotFoundError:
@@ -1485,10 +1676,9 @@ async def get_factory_settings():
 @web_router.put("/factory-settings")
 async def update_factory_settings(request: Request):
     """Update Factory CLI settings.json"""
-    from api.settings_handler import read_settings, write_settings, validate_settings
     
     try:
-        new_settings = await request.json()
+        new_settings = orjson.loads(await request.body())
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
     
@@ -1508,11 +1698,10 @@ async def update_factory_settings(request: Request):
 # ============ Models Configuration Endpoints ============
 
 @web_router.get("/config/models")
-async def get_models_config():
+async def get_models_config(request: Request):
     """Get all models (default + custom)"""
-    from api.models_handler import get_all_models
     try:
-        return get_all_models()
+        return _cached_json_response(request, "models", get_models_version(), get_all_models)
     except Exception as e:
         logger.error(f"Failed to get models config: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1521,9 +1710,8 @@ async def get_models_config():
 @web_router.post("/config/models/default")
 async def add_default_model_endpoint(request: Request):
     """Add a new default model"""
-    from api.models_handler import add_default_model
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         if not data.get("id") or not data.get("name"):
             raise HTTPException(status_code=400, detail="Model ID and name are required")
         
@@ -1541,9 +1729,8 @@ async def add_default_model_endpoint(request: Request):
 @web_router.put("/config/models/default/{model_id}")
 async def update_default_model_endpoint(model_id: str, request: Request):
     """Update a default model"""
-    from api.models_handler import update_default_model
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         if update_default_model(model_id, data):
             return {"success": True}
         else:
@@ -1558,7 +1745,6 @@ async def update_default_model_endpoint(model_id: str, request: Request):
 @web_router.delete("/config/models/default/{model_id}")
 async def delete_default_model_endpoint(model_id: str):
     """Delete a default model"""
-    from api.models_handler import delete_default_model
     try:
         if delete_default_model(model_id):
             return {"success": True}
@@ -1574,9 +1760,8 @@ async def delete_default_model_endpoint(model_id: str):
 @web_router.put("/config/models/default-selection")
 async def set_default_model_endpoint(request: Request):
     """Set the default model selection"""
-    from api.models_handler import set_default_model_selection
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
         model_id = data.get("modelId")
         if not model_id:
             raise HTTPException(status_code=400, detail="modelId is required")
@@ -1595,12 +1780,11 @@ async def set_default_model_endpoint(request: Request):
 @web_router.post("/config/models/custom")
 async def add_custom_model_endpoint(request: Request):
     """Add a new custom model (writes to Factory CLI config)"""
-    from api.models_handler import add_custom_model, get_factory_config_path
     try:
         if not get_factory_config_path():
             raise HTTPException(status_code=400, detail="FACTORY_CUSTOM_MODEL_CONFIG_PATH not configured")
         
-        data = await request.json()
+        data = orjson.loads(await request.body())
         if not data.get("model") or not data.get("base_url") or not data.get("api_key"):
             raise HTTPException(status_code=400, detail="Model ID, base_url, and api_key are required")
         
@@ -1618,12 +1802,11 @@ async def add_custom_model_endpoint(request: Request):
 @web_router.put("/config/models/custom/{model_id}")
 async def update_custom_model_endpoint(model_id: str, request: Request):
     """Update a custom model"""
-    from api.models_handler import update_custom_model, get_factory_config_path
     try:
         if not get_factory_config_path():
             raise HTTPException(status_code=400, detail="FACTORY_CUSTOM_MODEL_CONFIG_PATH not configured")
         
-        data = await request.json()
+        data = orjson.loads(await request.body())
         if update_custom_model(model_id, data):
             return {"success": True}
         else:
@@ -1638,7 +1821,6 @@ async def update_custom_model_endpoint(model_id: str, request: Request):
 @web_router.delete("/config/models/custom/{model_id}")
 async def delete_custom_model_endpoint(model_id: str):
     """Delete a custom model"""
-    from api.models_handler import delete_custom_model, get_factory_config_path
     try:
         if not get_factory_config_path():
             raise HTTPException(status_code=400, detail="FACTORY_CUSTOM_MODEL_CONFIG_PATH not configured")
@@ -1666,15 +1848,13 @@ async def check_allowlist(tool_name: str, tool_input: str = "{}", session_id: Op
         - decision: "allow", "deny", or "ask" (no matching rule)
         - allowed: boolean for backward compatibility
     """
-    import json
-    from core.repositories import get_permission_rules_repo
     
     try:
-        input_dict = json.loads(tool_input)
-    except json.JSONDecodeError:
+        input_dict = orjson.loads(tool_input)
+    except orjson.JSONDecodeError:
         input_dict = {"raw": tool_input}
     
-    result = get_permission_rules_repo().check_permission(tool_name, input_dict, session_id)
+    result = _permission_rules_repo.check_permission(tool_name, input_dict, session_id)
     
     return {
         "decision": result or "ask",
@@ -1687,36 +1867,32 @@ async def check_allowlist(tool_name: str, tool_input: str = "{}", session_id: Op
 # Notification Endpoints
 
 @web_router.get("/notifications")
-async def get_notifications(unread_only: bool = False, limit: int = 50):
+async def get_notifications(unread_only: bool = False, limit: int = Query(50, ge=1, le=MAX_HISTORY_LIMIT)):
     """Get all notifications, optionally filtered to unread only"""
-    from core.repositories import get_notification_repo
-    notifications = get_notification_repo().get_all(unread_only=unread_only, limit=limit)
-    unread_count = get_notification_repo().get_unread_count()
+    notifications = await asyncio.to_thread(_notification_repo.get_all, unread_only=unread_only, limit=limit)
+    unread_count = await asyncio.to_thread(_notification_repo.get_unread_count)
     return {"notifications": notifications, "unread_count": unread_count}
 
 
 @web_router.get("/notifications/count")
 async def get_notification_count():
     """Get unread notification count"""
-    from core.repositories import get_notification_repo
-    count = get_notification_repo().get_unread_count()
+    count = await asyncio.to_thread(_notification_repo.get_unread_count)
     return {"unread_count": count}
 
 
 @web_router.get("/notifications/session/{session_id}")
 async def get_session_notifications(session_id: str):
     """Get notifications for a specific session"""
-    from core.repositories import get_notification_repo
-    notifications = get_notification_repo().get_by_session(session_id)
-    unread_count = get_notification_repo().get_session_unread_count(session_id)
+    notifications = await asyncio.to_thread(_notification_repo.get_by_session, session_id)
+    unread_count = await asyncio.to_thread(_notification_repo.get_session_unread_count, session_id)
     return {"notifications": notifications, "unread_count": unread_count}
 
 
 @web_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: int):
     """Mark a notification as read"""
-    from core.repositories import get_notification_repo
-    success = get_notification_repo().mark_read(notification_id)
+    success = await asyncio.to_thread(_notification_repo.mark_read, notification_id)
     if success:
         return {"success": True}
     else:
@@ -1726,16 +1902,14 @@ async def mark_notification_read(notification_id: int):
 @web_router.put("/notifications/read-all")
 async def mark_all_notifications_read():
     """Mark all notifications as read"""
-    from core.repositories import get_notification_repo
-    count = get_notification_repo().mark_all_read()
+    count = await asyncio.to_thread(_notification_repo.mark_all_read)
     return {"success": True, "count": count}
 
 
 @web_router.delete("/notifications/{notification_id}")
 async def delete_notification(notification_id: int):
     """Delete a notification"""
-    from core.repositories import get_notification_repo
-    success = get_notification_repo().delete(notification_id)
+    success = await asyncio.to_thread(_notification_repo.delete, notification_id)
     if success:
         return {"success": True}
     else:
@@ -1745,37 +1919,31 @@ async def delete_notification(notification_id: int):
 @web_router.delete("/notifications")
 async def clear_all_notifications():
     """Clear all notifications"""
-    from core.repositories import get_notification_repo
-    count = get_notification_repo().clear_all()
+    count = await asyncio.to_thread(_notification_repo.clear_all)
     return {"success": True, "count": count}
 
 
 # Environment Settings Endpoints
 
 @web_router.get("/config/env")
-async def get_environment_settings():
+async def get_environment_settings(request: Request):
     """Get managed environment variables"""
-    from api.env_handler import get_managed_env, get_env_defaults, get_env_dirty, MANAGED_VARS, SENSITIVE_VARS
     
-    current = get_managed_env()
-    defaults = get_env_defaults()
-    
-    return {
-        "variables": current,
-        "defaults": defaults,
+    return _cached_json_response(request, "env", get_env_version(), lambda: {
+        "variables": get_managed_env(),
+        "defaults": get_env_defaults(),
         "managed_vars": MANAGED_VARS,
         "sensitive_vars": SENSITIVE_VARS,
         "dirty": get_env_dirty()
-    }
+    })
 
 
 @web_router.put("/config/env")
 async def update_environment_settings(request: Request):
     """Update managed environment variables"""
-    from api.env_handler import update_env_file, MANAGED_VARS
     
     try:
-        data = await request.json()
+        data = orjson.loads(await request.body())
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON")
     
@@ -1785,7 +1953,7 @@ async def update_environment_settings(request: Request):
     if not updates:
         raise HTTPException(status_code=400, detail="No valid variables to update")
     
-    success = update_env_file(updates)
+    success = await asyncio.to_thread(update_env_file, updates)
     if success:
         return {"success": True, "updated": list(updates.keys())}
     else:
@@ -1795,13 +1963,11 @@ async def update_environment_settings(request: Request):
 @web_router.get("/config/env/dirty")
 async def check_env_dirty():
     """Check if environment has been modified since server start"""
-    from api.env_handler import get_env_dirty
     return {"dirty": get_env_dirty()}
 
 
 @web_router.post("/config/env/dismiss")
 async def dismiss_env_dirty():
     """Dismiss the restart notification (clears dirty flag)"""
-    from api.env_handler import set_env_dirty
     set_env_dirty(False)
     return {"success": True}
@@ -2,23 +2,60 @@
 
 import os
 import re
-import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Default path for Factory settings
 DEFAULT_SETTINGS_PATH = Path.home() / ".factory" / "settings.json"
 
+# A JSON string (group 1, kept) or a // comment up to the end of the line
+_COMMENT_RE = re.compile(r'("(?:[^"\\\n]|\\.)*")|//[^\n]*')
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+
+# validate_settings rules: field -> (allowed values, error text listing them in order)
+_REASONING_CHOICES = (frozenset({"off", "low", "medium", "high"}),
+                      "reasoningEffort must be one of: ['off', 'low', 'medium', 'high']")
+_AUTONOMY_CHOICES = (frozenset({"auto-low", "auto-medium", "auto-high"}),
+                     "autonomyMode must be one of: ['auto-low', 'auto-medium', 'auto-high']")
+_FOCUS_CHOICES = (frozenset({"always", "focused", "never"}),
+                  "soundFocusMode must be one of: ['always', 'focused', 'never']")
+_BOOL_FIELDS = (
+    "cloudSessionSync", "enableCompletionBell", "enableCustomDroids",
+    "includeCoAuthoredByDroid", "enableDroidShield", "enableReadinessReport",
+    "allowBackgroundProcesses", "showThinkingInMainView"
+)
+_LIST_FIELDS = ("commandAllowlist", "commandDenylist")
+_VALID_HOOK_EVENTS = frozenset({
+    "PreToolUse", "PostToolUse", "UserPromptSubmit",
+    "Notification", "Stop", "SubagentStop",
+    "SessionStart", "SessionEnd"
+})
+
+
+@lru_cache(maxsize=4)
+def _settings_path(env_path: Optional[str]) -> Path:
+    return Path(env_path) if env_path else DEFAULT_SETTINGS_PATH
+
 
 def get_settings_path() -> Path:
     """Get the Factory settings.json path from env or default."""
-    env_path = os.getenv("FACTORY_SETTINGS_PATH")
-    if env_path:
-        return Path(env_path)
-    return DEFAULT_SETTINGS_PATH
+    return _settings_path(os.getenv("FACTORY_SETTINGS_PATH"))
+
+
+def get_settings_version() -> tuple:
+    """Cheap change marker for get_settings_summary (path, file mtime and write count)."""
+    settings_path = get_settings_path()
+    try:
+        mtime = settings_path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    return (str(settings_path), mtime, _write_generation)
 
 
 def strip_json_comments(json_str: str) -> str:
@@ -27,72 +64,26 @@ def strip_json_comments(json_str: str) -> str:
     Handles comments carefully to avoid breaking URLs (http://, https://)
     and other valid JSON content containing //.
     """
-    # Remove single-line comments, but not // inside strings
-    # Match // that's not inside a string value
-    # This regex matches:
-    # 1. Strings (to skip them): "(?:[^"\\]|\\.)*"
-    # 2. Or actual comments: //.*?(?=\n|$)
-    # We keep strings and remove comments
-    
-    # Simple approach: Only remove // comments that are NOT inside quoted strings
-    # Split by lines and process each line
-    lines = json_str.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        # Skip if line is inside a string (basic check)
-        # Look for // that's not inside quotes
-        in_string = False
-        escape_next = False
-        comment_start = -1
-        
-        for i, char in enumerate(line):
-            if escape_next:
-                escape_next = False
-                continue
-            
-            if char == '\\':
-                escape_next = True
-                continue
-            
-            if char == '"' and not escape_next:
-                in_string = not in_string
-            
-            # Check for // outside of strings
-            if not in_string and i < len(line) - 1:
-                if char == '/' and line[i + 1] == '/':
-                    comment_start = i
-                    break
-        
-        # Remove comment if found
-        if comment_start >= 0:
-            line = line[:comment_start].rstrip()
-        
-        cleaned_lines.append(line)
-    
-    json_str = '\n'.join(cleaned_lines)
+    # Remove // comments that are NOT inside quoted strings: the pattern
+    # consumes whole strings (kept via the group) so // inside them never matches
+    if '//' in json_str:
+        json_str = _COMMENT_RE.sub(lambda m: m.group(1) or '', json_str)
     
     # Remove trailing commas before } or ]
-    json_str = re.sub(r',\s*([}\]])', r'\1', json_str)
-    
-    return json_str
+    return _TRAILING_COMMA_RE.sub(r'\1', json_str)
 
 
-def read_settings() -> dict[str, Any]:
-    """Read Factory settings.json file."""
-    settings_path = get_settings_path()
-    
-    if not settings_path.exists():
-        logger.warning(f"Settings file not found: {settings_path}")
-        return {}
-    
+@lru_cache(maxsize=8)
+def _read_settings_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parse settings.json; cached per (path, mtime, size) so edits are picked up."""
+    settings_path = Path(path_str)
     try:
         content = settings_path.read_text(encoding="utf-8")
         clean_content = strip_json_comments(content)
-        settings = json.loads(clean_content)
+        settings = orjson.loads(clean_content)
         logger.info(f"Loaded settings from {settings_path}")
         return settings
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse settings.json: {e}")
         raise ValueError(f"Invalid JSON in settings file: {e}")
     except Exception as e:
@@ -100,6 +91,29 @@ def read_settings() -> dict[str, Any]:
         raise
 
 
+def read_settings() -> dict[str, Any]:
+    """Read Factory settings.json file (shared cached dict; treat as read-only)."""
+    settings_path = get_settings_path()
+    
+    try:
+        stat = settings_path.stat()
+    except OSError:
+        logger.warning(f"Settings file not found: {settings_path}")
+        return {}
+    
+    return _read_settings_cached(str(settings_path), stat.st_mtime_ns, stat.st_size)
+
+
+# Bumped by every write_settings() so get_settings_version() changes even
+# when the rewrite lands in the same mtime tick
+_write_generation = 0
+
+
+def _bump_write_generation() -> None:
+    global _write_generation
+    _write_generation += 1
+
+
 def write_settings(settings: dict[str, Any]) -> None:
     """Write settings to Factory settings.json file."""
     settings_path = get_settings_path()
@@ -109,14 +123,26 @@ def write_settings(settings: dict[str, Any]) -> None:
     
     try:
         # Write with pretty formatting
-        content = json.dumps(settings, indent=2, ensure_ascii=False)
-        settings_path.write_text(content, encoding="utf-8")
+        content = orjson.dumps(settings, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        settings_path.write_bytes(content)
+        # mtime granularity can hide a quick rewrite; never serve the old parse
+        _read_settings_cached.cache_clear()
+        _bump_write_generation()
         logger.info(f"Saved settings to {settings_path}")
     except Exception as e:
         logger.error(f"Failed to write settings: {e}")
         raise
 
 
+def _check_choice(settings: dict[str, Any], field: str, choices: tuple, errors: list[str]) -> None:
+    """Append the field's error if it is set to something outside its choices."""
+    if field in settings:
+        value = settings[field]
+        # Every choice is a string; checking first keeps unhashable values out of the set lookup
+        if not isinstance(value, str) or value not in choices[0]:
+            errors.append(choices[1])
+
+
 def validate_settings(settings: dict[str, Any]) -> list[str]:
     """Validate settings and return list of errors."""
     errors = []
@@ -126,37 +152,26 @@ def validate_settings(settings: dict[str, Any]) -> list[str]:
         errors.append("model must be a string")
     
     # Validate reasoningEffort
-    valid_reasoning = ["off", "low", "medium", "high"]
-    if "reasoningEffort" in settings and settings["reasoningEffort"] not in valid_reasoning:
-        errors.append(f"reasoningEffort must be one of: {valid_reasoning}")
+    _check_choice(settings, "reasoningEffort", _REASONING_CHOICES, errors)
     
     # Validate autonomyMode
-    valid_autonomy = ["auto-low", "auto-medium", "auto-high"]
-    if "autonomyMode" in settings and settings["autonomyMode"] not in valid_autonomy:
-        errors.append(f"autonomyMode must be one of: {valid_autonomy}")
+    _check_choice(settings, "autonomyMode", _AUTONOMY_CHOICES, errors)
     
     # Validate boolean fields
-    bool_fields = [
-        "cloudSessionSync", "enableCompletionBell", "enableCustomDroids",
-        "includeCoAuthoredByDroid", "enableDroidShield", "enableReadinessReport",
-        "allowBackgroundProcesses", "showThinkingInMainView"
-    ]
-    for field in bool_fields:
+    for field in _BOOL_FIELDS:
         if field in settings and not isinstance(settings[field], bool):
             errors.append(f"{field} must be a boolean")
     
     # Validate soundFocusMode
-    valid_focus = ["always", "focused", "never"]
-    if "soundFocusMode" in settings and settings["soundFocusMode"] not in valid_focus:
-        errors.append(f"soundFocusMode must be one of: {valid_focus}")
+    _check_choice(settings, "soundFocusMode", _FOCUS_CHOICES, errors)
     
     # Validate command lists
-    list_fields = ["commandAllowlist", "commandDenylist"]
-    for field in list_fields:
+    for field in _LIST_FIELDS:
         if field in settings:
             if not isinstance(settings[field], list):
                 errors.append(f"{field} must be an array")
-            elif not all(isinstance(item, str) for item in settings[field]):
+            # Type scan runs in C (map/set); JSON only yields exact str instances
+            elif not set(map(type, settings[field])) <= {str}:
                 errors.append(f"{field} must contain only strings")
     
     # Validate hooks
@@ -164,13 +179,8 @@ def validate_settings(settings: dict[str, Any]) -> list[str]:
         if not isinstance(settings["hooks"], dict):
             errors.append("hooks must be an object")
         else:
-            valid_hook_events = [
-                "PreToolUse", "PostToolUse", "UserPromptSubmit",
-                "Notification", "Stop", "SubagentStop",
-                "SessionStart", "SessionEnd"
-            ]
             for event, hook_list in settings["hooks"].items():
-                if event not in valid_hook_events:
+                if event not in _VALID_HOOK_EVENTS:
                     errors.append(f"Unknown hook event: {event}")
                 if not isinstance(hook_list, list):
                     errors.append(f"hooks.{event} must be an array")
@@ -180,9 +190,10 @@ def validate_settings(settings: dict[str, Any]) -> list[str]:
 
 def get_settings_summary() -> dict[str, Any]:
     """Get a summary of current settings for display."""
+    settings_path = get_settings_path()
     settings = read_settings()
     return {
-        "path": str(get_settings_path()),
-        "exists": get_settings_path().exists(),
+        "path": str(settings_path),
+        "exists": settings_path.exists(),
         "settings": settings
     }
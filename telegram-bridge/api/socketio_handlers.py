@@ -1,17 +1,59 @@
 """
 Socket.IO event handlers for real-time Web UI updates
 """
+import asyncio
 import logging
+from functools import lru_cache
 from typing import Optional
+import orjson
 import socketio
 
 from core.session_registry import session_registry
 from core.message_queue import message_queue
 from core.models import SessionStatus
-from core.repositories import get_permission_repo
+from core.repositories import get_permission_repo, get_permission_rules_repo
+from api import event_bus
 
 logger = logging.getLogger(__name__)
 
+# Repository singletons, resolved once instead of per request
+_permission_repo = get_permission_repo()
+_permission_rules_repo = get_permission_rules_repo()
+
+
+def _pattern_from_input(tool_name: str, input_dict) -> str:
+    """Permission rule pattern for a tool call, based on tool type"""
+    if not isinstance(input_dict, dict):
+        return '*'
+    if tool_name == 'Execute':
+        return input_dict.get('command', '*')
+    if tool_name in ('Read', 'Edit', 'Create', 'MultiEdit'):
+        return input_dict.get('file_path', '*')
+    return '*'
+
+
+@lru_cache(maxsize=512)
+def _rule_pattern(tool_name: str, tool_input: str) -> str:
+    """_pattern_from_input for a JSON tool_input string, parsed once per distinct input"""
+    try:
+        input_dict = orjson.loads(tool_input)
+    except orjson.JSONDecodeError:
+        input_dict = {}
+    return _pattern_from_input(tool_name, input_dict)
+
+
+class OrjsonCodec:
+    """json-module stand-in so Socket.IO packets are encoded with orjson"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        # separators etc. are ignored: orjson output is already compact
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    @staticmethod
+    def loads(data, *args, **kwargs):
+        return orjson.loads(data)
+
 
 def create_socketio_server() -> socketio.AsyncServer:
     """Create and configure Socket.IO server"""
@@ -19,38 +61,46 @@ def create_socketio_server() -> socketio.AsyncServer:
         async_mode="asgi",
         cors_allowed_origins="*",
         logger=False,
-        engineio_logger=False
+        engineio_logger=False,
+        json=OrjsonCodec
     )
     
     @sio.event
     async def connect(sid, environ, auth=None):
         """Handle client connection (auth contains token if provided)"""
-        logger.info(f"Client connected: {sid}")
+        logger.info("Client connected: %s", sid)
+        event_bus.add_client(sid)
         
-        # Send current sessions
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions], to=sid)
+        # Send current sessions through the client's own queue (every sid is also
+        # a room), so a connect burst shares the snapshot encoded once per version
+        event_bus.publish("sessions_update", session_registry.get_all_dumped(), room=sid)
     
     @sio.event
     async def disconnect(sid):
         """Handle client disconnection"""
-        logger.info(f"Client disconnected: {sid}")
+        logger.info("Client disconnected: %s", sid)
+        event_bus.remove_client(sid)
     
     @sio.event
     async def subscribe(sid, data):
         """Subscribe to a specific session's updates"""
         session_id = data.get("sessionId")
         if session_id:
-            await sio.enter_room(sid, f"session:{session_id}")
-            logger.info(f"Client {sid} subscribed to session {session_id}")
+            await sio.enter_room(sid, event_bus.session_room(session_id))
+            logger.info("Client %s subscribed to session %s", sid, session_id)
     
     @sio.event
     async def unsubscribe(sid, data):
         """Unsubscribe from a session's updates"""
         session_id = data.get("sessionId")
         if session_id:
-            await sio.leave_room(sid, f"session:{session_id}")
-            logger.info(f"Client {sid} unsubscribed from session {session_id}")
+            await sio.leave_room(sid, event_bus.session_room(session_id))
+            logger.info("Client %s unsubscribed from session %s", sid, session_id)
+    
+    def _publish_session_changed(session):
+        """Push only the acted-on session; clients patch it into their session lists"""
+        if session:
+            event_bus.publish("session_changed", session.to_json_dict())
     
     @sio.event
     async def respond(sid, data):
@@ -68,22 +118,15 @@ def create_socketio_server() -> socketio.AsyncServer:
         
         # Deliver response
         message_queue.deliver_response(session_id, request_id, response)
-        session_registry.update_status(session_id, SessionStatus.RUNNING)
-        session_registry.set_pending_request(session_id, None)
-        
-        # Broadcast update
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+        _publish_session_changed(
+            session_registry.update_status(session_id, SessionStatus.RUNNING, clear_pending=True)
+        )
         
-        logger.info(f"Response delivered via WebSocket: session={session_id}")
+        logger.info("Response delivered via WebSocket: session=%s", session_id)
         return {"success": True}
     
-    def _create_permission_rule(session_id: str, rule_type: str, scope: str):
-        """Helper to create a permission rule from pending request"""
-        import json
-        from core.repositories import get_permission_rules_repo
-        
-        session = session_registry.get(session_id)
+    def _permission_rule_fields(session, rule_type: str, scope: str) -> Optional[dict]:
+        """Fields for a permission rule built from the session's pending request"""
         if not session or not session.pending_request:
             return None
         
@@ -91,30 +134,31 @@ def create_socketio_server() -> socketio.AsyncServer:
         tool_name = pending.tool_name or ''
         tool_input = pending.tool_input or '{}'
         
-        try:
-            input_dict = json.loads(tool_input) if isinstance(tool_input, str) else tool_input
-        except:
-            input_dict = {}
-        
-        # Determine pattern based on tool type
-        if tool_name == 'Execute':
-            pattern = input_dict.get('command', '*')
-        elif tool_name in ('Read', 'Edit', 'Create', 'MultiEdit'):
-            pattern = input_dict.get('file_path', '*')
+        if isinstance(tool_input, str):
+            pattern = _rule_pattern(tool_name, tool_input)
         else:
-            pattern = '*'
-        
-        return get_permission_rules_repo().add(
-            tool_name=tool_name,
-            pattern=pattern,
-            rule_type=rule_type,
-            scope=scope,
-            session_id=session_id if scope == 'session' else None
-        )
+            pattern = _pattern_from_input(tool_name, tool_input)
+        
+        return {
+            "tool_name": tool_name,
+            "pattern": pattern,
+            "rule_type": rule_type,
+            "scope": scope,
+            "session_id": session.id if scope == 'session' else None,
+        }
     
-    @sio.event
-    async def approve(sid, data):
-        """Handle approve action from Web UI"""
+    async def _record_decision(request_id: Optional[str], decision: str, rule_fields: Optional[dict]):
+        """Insert the permission rule and resolve the request concurrently, off the event loop"""
+        rule_task = None
+        async with asyncio.TaskGroup() as tg:
+            if rule_fields:
+                rule_task = tg.create_task(asyncio.to_thread(_permission_rules_repo.add, **rule_fields))
+            if request_id:
+                tg.create_task(asyncio.to_thread(_permission_repo.resolve, request_id, decision, "web"))
+        return rule_task.result() if rule_task else None
+    
+    async def _resolve(data, response: str, rule_type: str, decided: str):
+        """Shared approve/deny flow: answer the hook, record the decision, broadcast"""
         session_id = data.get("sessionId")
         request_id = data.get("requestId")
         scope = data.get("scope")  # Optional: 'session' or 'global'
@@ -127,64 +171,34 @@ def create_socketio_server() -> socketio.AsyncServer:
         if not request_id and session and session.pending_request:
             request_id = session.pending_request.id
         
-        # Create permission rule if scope provided
-        rule = None
+        # Build the rule from the pending request now, before resolving it can change it
+        rule_fields = None
         if scope in ('session', 'global'):
-            rule = _create_permission_rule(session_id, 'allow', scope)
+            rule_fields = _permission_rule_fields(session, rule_type, scope)
         
-        message_queue.deliver_response(session_id, request_id, "approve")
-        
-        # Update permission in database
-        if request_id:
-            decision = f"approved_{scope}" if scope else "approved"
-            get_permission_repo().resolve(request_id, decision, "web")
-        
-        session_registry.update_status(session_id, SessionStatus.RUNNING)
-        session_registry.set_pending_request(session_id, None)
+        # Unblock the waiting hook first; it must not wait on SQLite
+        message_queue.deliver_response(session_id, request_id, response)
         
-        # Broadcast update
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
+        decision = f"{decided}_{scope}" if scope else decided
+        try:
+            rule = await _record_decision(request_id, decision, rule_fields)
+        finally:
+            _publish_session_changed(
+                session_registry.update_status(session_id, SessionStatus.RUNNING, clear_pending=True)
+            )
         
-        logger.info(f"Approved via WebSocket: session={session_id}, request={request_id}, scope={scope}")
+        logger.info("%s via WebSocket: session=%s, request=%s, scope=%s", decided.capitalize(), session_id, request_id, scope)
         return {"success": True, "rule": rule}
     
+    @sio.event
+    async def approve(sid, data):
+        """Handle approve action from Web UI"""
+        return await _resolve(data, "approve", "allow", "approved")
+    
     @sio.event
     async def deny(sid, data):
         """Handle deny action from Web UI"""
-        session_id = data.get("sessionId")
-        request_id = data.get("requestId")
-        scope = data.get("scope")  # Optional: 'session' or 'global'
-        
-        if not session_id:
-            return {"error": "Missing sessionId"}
-        
-        # Get request_id from session if not provided
-        session = session_registry.get(session_id)
-        if not request_id and session and session.pending_request:
-            request_id = session.pending_request.id
-        
-        # Create permission rule if scope provided
-        rule = None
-        if scope in ('session', 'global'):
-            rule = _create_permission_rule(session_id, 'deny', scope)
-        
-        message_queue.deliver_response(session_id, request_id, "deny")
-        
-        # Update permission in database
-        if request_id:
-            decision = f"denied_{scope}" if scope else "denied"
-            get_permission_repo().resolve(request_id, decision, "web")
-        
-        session_registry.update_status(session_id, SessionStatus.RUNNING)
-        session_registry.set_pending_request(session_id, None)
-        
-        # Broadcast update
-        sessions = session_registry.get_all()
-        await sio.emit("sessions_update", [s.model_dump(mode='json') for s in sessions])
-        
-        logger.info(f"Denied via WebSocket: session={session_id}, request={request_id}, scope={scope}")
-        return {"success": True, "rule": rule}
+        return await _resolve(data, "deny", "deny", "denied")
     
     @sio.event
     async def always_allow(sid, data):
@@ -195,8 +209,7 @@ def create_socketio_server() -> socketio.AsyncServer:
     @sio.event
     async def get_sessions(sid):
         """Get all sessions"""
-        sessions = session_registry.get_all()
-        return [s.model_dump(mode='json') for s in sessions]
+        return session_registry.get_all_dumped()
     
     return sio
 
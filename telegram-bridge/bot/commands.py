@@ -1,6 +1,7 @@
 """
 Telegram bot command handlers
 """
+import asyncio
 import logging
 from telegram import Update, BotCommand, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
@@ -8,7 +9,7 @@ from telegram.ext import ContextTypes
 from core.session_registry import session_registry
 from core.message_queue import message_queue
 from core.models import SessionStatus, ControlState
-from .keyboards import build_session_keyboard
+from .keyboards import build_session_keyboard, STATUS_EMOJI
 
 # Available models for droid exec
 AVAILABLE_MODELS = [
@@ -29,15 +30,18 @@ AVAILABLE_MODELS = [
 logger = logging.getLogger(__name__)
 
 
+# Command menu registered with Telegram (BotCommand objects are immutable)
+BOT_COMMANDS = [
+    BotCommand("start", "Start the bot"),
+    BotCommand("help", "Show available commands"),
+    BotCommand("sessions", "List all active sessions"),
+    BotCommand("status", "Check session status"),
+]
+
+
 async def setup_commands(application) -> None:
     """Register bot commands with Telegram"""
-    commands = [
-        BotCommand("start", "Start the bot"),
-        BotCommand("help", "Show available commands"),
-        BotCommand("sessions", "List all active sessions"),
-        BotCommand("status", "Check session status"),
-    ]
-    await application.bot.set_my_commands(commands)
+    await application.bot.set_my_commands(BOT_COMMANDS)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -73,6 +77,20 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     )
 
 
+def _find_session(ref: str):
+    """Resolve a /command argument to a session by index (the usual /1, /2) or by name"""
+    if ref.isdecimal():
+        session = session_registry.get_by_index(int(ref))
+        if session:
+            return session
+    return session_registry.get_by_name(ref)
+
+
+# Fixed parts of the /sessions listing
+SESSIONS_HEADER = "📋 *Active Sessions*\n"
+SESSIONS_FOOTER = "\nUse /switch <name> or reply with /<number> <message>"
+
+
 async def sessions_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /sessions command"""
     sessions = session_registry.get_all()
@@ -81,29 +99,17 @@ async def sessions_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         await update.message.reply_text("📋 *No active sessions*", parse_mode="Markdown")
         return
     
-    status_emoji = {
-        "running": "🟡",
-        "waiting": "🟢",
-        "stopped": "🔴"
-    }
-    
-    lines = ["📋 *Active Sessions*\n"]
-    
-    for i, session in enumerate(sessions, 1):
-        emoji = status_emoji.get(session.status, "⚪")
-        lines.append(f"{i}. {emoji} `{session.name}`")
-        
-        status_text = session.status.capitalize() if isinstance(session.status, str) else session.status.value.capitalize()
-        lines.append(f"   └─ {status_text}")
-        
-        if session.pending_request:
-            lines.append(f"   └─ ⚠️ Pending: {session.pending_request.type}")
-    
-    lines.append("\nUse /switch <name> or reply with /<number> <message>")
+    emoji_get = STATUS_EMOJI.get
+    body = "\n".join(
+        f"{i}. {emoji_get(session.status, '⚪')} `{session.name}`\n"
+        f"   └─ {(session.status if isinstance(session.status, str) else session.status.value).capitalize()}"
+        + (f"\n   └─ ⚠️ Pending: {session.pending_request.type}" if session.pending_request else "")
+        for i, session in enumerate(sessions, 1)
+    )
     
     keyboard = build_session_keyboard(sessions)
     await update.message.reply_text(
-        "\n".join(lines),
+        f"{SESSIONS_HEADER}\n{body}\n{SESSIONS_FOOTER}",
         parse_mode="Markdown",
         reply_markup=keyboard
     )
@@ -116,15 +122,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if args:
         # Status for specific session
         name = " ".join(args)
-        session = session_registry.get_by_name(name)
-        
-        if not session:
-            # Try by index
-            try:
-                index = int(name)
-                session = session_registry.get_by_index(index)
-            except ValueError:
-                pass
+        session = _find_session(name)
         
         if not session:
             await update.message.reply_text(f"❌ Session not found: {name}")
@@ -139,7 +137,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     
     for session in sessions:
-        status_emoji = {"running": "🟡", "waiting": "🟢", "stopped": "🔴"}.get(session.status, "⚪")
+        status_emoji = STATUS_EMOJI.get(session.status, "⚪")
         
         msg = (
             f"{status_emoji} *{session.name}*\n\n"
@@ -167,14 +165,7 @@ async def switch_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     
     name = " ".join(args)
-    session = session_registry.get_by_name(name)
-    
-    if not session:
-        try:
-            index = int(name)
-            session = session_registry.get_by_index(index)
-        except ValueError:
-            pass
+    session = _find_session(name)
     
     if not session:
         await update.message.reply_text(f"❌ Session not found: {name}")
@@ -224,13 +215,12 @@ async def stopall_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("📋 No active sessions to stop")
         return
     
-    count = 0
+    # Delivery only resolves in-memory futures; the status change is one DB write
     for session in sessions:
         message_queue.deliver_response(session.id, None, "done")
-        session_registry.update_status(session.id, SessionStatus.STOPPED)
-        count += 1
+    session_registry.stop_sessions([session.id for session in sessions])
     
-    await update.message.reply_text(f"✅ Stopped {count} session(s)")
+    await update.message.reply_text(f"✅ Stopped {len(sessions)} session(s)")
 
 
 async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -251,12 +241,10 @@ async def broadcast_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("No waiting sessions")
         return
     
-    count = 0
     for session in waiting:
         message_queue.deliver_response(session.id, None, message)
-        count += 1
     
-    await update.message.reply_text(f"Broadcast sent to {count} session(s):\n{message}")
+    await update.message.reply_text(f"Broadcast sent to {len(waiting)} session(s):\n{message}")
 
 
 async def setproject_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -275,8 +263,8 @@ async def setproject_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     project_dir = " ".join(args)
     
-    # Validate path exists
-    if not os.path.isdir(project_dir):
+    # Validate path exists (off the event loop: the stat can block on slow or network mounts)
+    if not await asyncio.to_thread(os.path.isdir, project_dir):
         await update.message.reply_text(f"Directory not found: {project_dir}")
         return
     
@@ -354,13 +342,7 @@ async def handoff_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Determine which session to handoff
     if args:
         name = " ".join(args)
-        session = session_registry.get_by_name(name)
-        if not session:
-            try:
-                index = int(name)
-                session = session_registry.get_by_index(index)
-            except ValueError:
-                pass
+        session = _find_session(name)
     else:
         # Use active session or first waiting session
         active_session_id = context.user_data.get("active_session")
@@ -417,13 +399,7 @@ async def release_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # Determine which session to release
     if args:
         name = " ".join(args)
-        session = session_registry.get_by_name(name)
-        if not session:
-            try:
-                index = int(name)
-                session = session_registry.get_by_index(index)
-            except ValueError:
-                pass
+        session = _find_session(name)
     else:
         # Use active session or first remote-controlled session
         active_session_id = context.user_data.get("active_session")
@@ -6,6 +6,13 @@ from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 from core.models import Button
 
+# Session status -> indicator shown in session lists ("⚪" for anything else)
+STATUS_EMOJI = {
+    "running": "🟡",
+    "waiting": "🟢",
+    "stopped": "🔴"
+}
+
 
 def build_inline_keyboard(
     buttons: List[Button],
@@ -78,13 +85,10 @@ def build_stop_keyboard(
 def build_session_keyboard(sessions: list) -> InlineKeyboardMarkup:
     """Build keyboard for session selection"""
     buttons = []
+    emoji_get = STATUS_EMOJI.get
     
     for i, session in enumerate(sessions[:10], 1):  # Limit to 10 sessions
-        status_emoji = {
-            "running": "🟡",
-            "waiting": "🟢",
-            "stopped": "🔴"
-        }.get(session.status, "⚪")
+        status_emoji = emoji_get(session.status, "⚪")
         
         buttons.append([
             InlineKeyboardButton(
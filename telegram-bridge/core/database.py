@@ -204,6 +204,10 @@ class Database:
             self._local.connection.row_factory = sqlite3.Row
             # Enable foreign keys
             self._local.connection.execute("PRAGMA foreign_keys = ON")
+            # WAL lets readers in worker threads run alongside a writer;
+            # NORMAL sync is durable in WAL mode except on power loss
+            self._local.connection.execute("PRAGMA journal_mode = WAL")
+            self._local.connection.execute("PRAGMA synchronous = NORMAL")
         return self._local.connection
     
     def _init_schema(self):
@@ -4,19 +4,23 @@ Message Queue - Handles async response queues per session
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Iterable, Tuple
 from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# Responses delivered while nobody waits are kept for a later wait; cap them
+# per session so replies to abandoned requests cannot pile up
+MAX_STORED_RESPONSES = 16
+
 
 @dataclass
 class PendingWait:
     """Represents a pending wait for response"""
     request_id: str
     session_id: str
+    future: asyncio.Future
     created_at: datetime = field(default_factory=datetime.utcnow)
-    future: asyncio.Future = field(default_factory=lambda: asyncio.get_event_loop().create_future())
 
 
 class MessageQueue:
@@ -46,29 +50,25 @@ class MessageQueue:
                 del self._responses[session_id]
             return response
         
-        # Create pending wait
-        if session_id not in self._pending_waits:
-            self._pending_waits[session_id] = {}
-        
-        # Get or create event loop
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        # Nothing stored and no time to wait: skip the future and timer entirely
+        if timeout is not None and timeout <= 0:
+            return None
         
+        # Create pending wait: a bare future resolved by deliver_response, so a
+        # waiting hook costs one future on the loop (no thread, no polling)
         pending = PendingWait(
             request_id=request_id,
             session_id=session_id,
-            future=loop.create_future()
+            future=asyncio.get_running_loop().create_future()
         )
-        self._pending_waits[session_id][request_id] = pending
+        self._pending_waits.setdefault(session_id, {})[request_id] = pending
         
         try:
-            response = await asyncio.wait_for(pending.future, timeout=timeout)
+            async with asyncio.timeout(timeout):
+                response = await pending.future
             logger.info(f"Received response for session {session_id}, request {request_id}")
             return response
-        except asyncio.TimeoutError:
+        except TimeoutError:
             logger.warning(f"Timeout waiting for response: session {session_id}, request {request_id}")
             return None
         finally:
@@ -109,14 +109,12 @@ class MessageQueue:
                 return True
         
         # Store for later retrieval if no pending wait
-        if session_id not in self._responses:
-            self._responses[session_id] = {}
-        
-        if request_id:
-            self._responses[session_id][request_id] = response
-        else:
-            # Use a generic key if no request_id
-            self._responses[session_id]["_latest"] = response
+        stored = self._responses.setdefault(session_id, {})
+        key = request_id or "_latest"  # Use a generic key if no request_id
+        stored.pop(key, None)
+        stored[key] = response
+        while len(stored) > MAX_STORED_RESPONSES:
+            del stored[next(iter(stored))]
         
         logger.info(f"Stored response for later: session {session_id}")
         return True
@@ -131,12 +129,24 @@ class MessageQueue:
             return self._responses[session_id].pop(request_id, None)
         return None
     
+    def get_pending_responses(
+        self,
+        pairs: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        """Get stored responses for several (session_id, request_id) pairs without blocking"""
+        # Reading consumes the response, so a repeated pair must only be read once
+        return {
+            (session_id, request_id): self.get_pending_response(session_id, request_id)
+            for session_id, request_id in dict.fromkeys(pairs)
+        }
+    
     def has_pending_waits(self, session_id: str) -> bool:
         """Check if session has any pending waits"""
         return bool(self._pending_waits.get(session_id))
     
     def cancel_all_waits(self, session_id: str):
-        """Cancel all pending waits for a session"""
+        """Cancel all pending waits for a session and drop its stored responses"""
+        self._responses.pop(session_id, None)
         if session_id in self._pending_waits:
             for pending in self._pending_waits[session_id].values():
                 if not pending.future.done():
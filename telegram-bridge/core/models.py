@@ -2,8 +2,8 @@
 Pydantic models for the bridge server
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 
 
@@ -58,9 +58,23 @@ class Session(BaseModel):
     pending_request: Optional[PendingRequest] = None
     transcript_path: Optional[str] = None
 
+    # model_dump(mode='json') of this instance, reset on any field assignment
+    _json_cache: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
     class Config:
         use_enum_values = True
     
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name != '_json_cache':
+            self._json_cache = None
+    
+    def to_json_dict(self) -> Dict[str, Any]:
+        """JSON-ready dump, computed once per instance; treat the result as read-only"""
+        if self._json_cache is None:
+            self._json_cache = self.model_dump(mode='json')
+        return self._json_cache
+    
     @property
     def is_remote_controlled(self) -> bool:
         """Check if session is under remote control"""
@@ -118,6 +132,15 @@ class RespondRequest(BaseModel):
     response: str
 
 
+class ResponseQueryRequest(BaseModel):
+    pairs: List[Tuple[str, str]]  # (session_id, request_id)
+
+
+class SessionOpResponse(BaseModel):
+    success: bool = True
+    session: Session
+
+
 class HealthResponse(BaseModel):
     status: str = "healthy"
     active_sessions: int = 0
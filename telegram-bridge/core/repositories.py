@@ -3,10 +3,50 @@ Repository classes for database operations
 """
 import uuid
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from threading import Lock
+from typing import Optional, List, Dict, Any, Tuple
 from .database import get_db, row_to_dict, json_serialize, json_deserialize
 
 
+# Change counter for everything SessionRegistry exposes (session rows and
+# pending permission requests). Bumped after each committed write so callers
+# can cache derived snapshots and detect staleness with one integer compare.
+_sessions_version = 0
+_sessions_version_lock = Lock()
+
+
+def bump_sessions_version() -> int:
+    """Mark session state as changed and return the new version"""
+    global _sessions_version
+    with _sessions_version_lock:
+        _sessions_version += 1
+        return _sessions_version
+
+
+def get_sessions_version() -> int:
+    """Get the current session state version"""
+    return _sessions_version
+
+
+# Change counter for the history tables (session_events, permission_requests,
+# tasks), used to answer unchanged history polls without querying
+_history_version = 0
+_history_version_lock = Lock()
+
+
+def bump_history_version() -> int:
+    """Mark history tables as changed and return the new version"""
+    global _history_version
+    with _history_version_lock:
+        _history_version += 1
+        return _history_version
+
+
+def get_history_version() -> int:
+    """Get the current history version"""
+    return _history_version
+
+
 class SessionRepository:
     """Repository for sessions table"""
     
@@ -28,6 +68,7 @@ class SessionRepository:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (session_id, name, project_dir, status, control_state, transcript_path, now, now))
         db.commit()
+        bump_sessions_version()
         
         # Log event
         SessionEventRepository().create(session_id, "session_created", {
@@ -89,6 +130,7 @@ class SessionRepository:
         
         db.execute(f"UPDATE sessions SET {fields} WHERE id = ?", tuple(values))
         db.commit()
+        bump_sessions_version()
         
         return self.get_by_id(session_id)
     
@@ -99,6 +141,37 @@ class SessionRepository:
             SessionEventRepository().create(session_id, "status_changed", {"status": status})
         return result
     
+    def bulk_update_status(self, session_ids: List[str], status: str) -> List[str]:
+        """Set the status of several sessions in one transaction; returns the IDs that changed"""
+        if not session_ids:
+            return []
+        db = get_db()
+        now = datetime.utcnow()
+        placeholders = ", ".join("?" * len(session_ids))
+        
+        cursor = db.execute(
+            f"SELECT id FROM sessions WHERE id IN ({placeholders}) AND status != ?",
+            (*session_ids, status)
+        )
+        changed = [row[0] for row in cursor.fetchall()]
+        if not changed:
+            return []
+        
+        placeholders = ", ".join("?" * len(changed))
+        db.execute(
+            f"UPDATE sessions SET status = ?, updated_at = ? WHERE id IN ({placeholders})",
+            (status, now, *changed)
+        )
+        event_data = json_serialize({"status": status})
+        db.executemany("""
+            INSERT INTO session_events (session_id, event_type, event_data, created_at)
+            VALUES (?, 'status_changed', ?, ?)
+        """, [(session_id, event_data, now) for session_id in changed])
+        db.commit()
+        bump_sessions_version()
+        bump_history_version()
+        return changed
+    
     def update_control_state(self, session_id: str, control_state: str) -> Optional[dict]:
         """Update session control state"""
         result = self.update(session_id, control_state=control_state)
@@ -123,6 +196,9 @@ class SessionRepository:
         db = get_db()
         cursor = db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
         db.commit()
+        bump_sessions_version()
+        # Notifications are removed by ON DELETE CASCADE
+        get_notification_repo().invalidate_unread_counts(session_id)
         return cursor.rowcount > 0
     
     def upsert(
@@ -153,6 +229,7 @@ class SessionEventRepository:
             VALUES (?, ?, ?, ?)
         """, (session_id, event_type, data_json, now))
         db.commit()
+        bump_history_version()
         
         return {"id": cursor.lastrowid, "session_id": session_id, "event_type": event_type, "created_at": now}
     
@@ -274,6 +351,15 @@ class QueuedMessageRepository:
             SELECT COUNT(*) FROM queued_messages WHERE session_id = ? AND status = 'pending'
         """, (session_id,))
         return cursor.fetchone()[0]
+    
+    def count_pending_by_session(self) -> Dict[str, int]:
+        """Count pending messages for every session with a non-empty queue"""
+        db = get_db()
+        cursor = db.execute("""
+            SELECT session_id, COUNT(*) FROM queued_messages
+            WHERE status = 'pending' GROUP BY session_id
+        """)
+        return {row[0]: row[1] for row in cursor.fetchall()}
 
 
 class PermissionRequestRepository:
@@ -300,6 +386,7 @@ class PermissionRequestRepository:
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (request_id, session_id, tool_name, tool_input_json, message, telegram_message_id, now))
         db.commit()
+        bump_sessions_version()
         
         return {
             "id": request_id,
@@ -349,6 +436,7 @@ class PermissionRequestRepository:
             WHERE id = ?
         """, (decision, decided_by, now, request_id))
         db.commit()
+        bump_sessions_version()
         
         # Log event
         request = self.get_by_id(request_id)
@@ -369,6 +457,7 @@ class PermissionRequestRepository:
             UPDATE permission_requests SET telegram_message_id = ? WHERE id = ?
         """, (telegram_message_id, request_id))
         db.commit()
+        bump_sessions_version()
         return cursor.rowcount > 0
     
     def get_history(self, session_id: Optional[str] = None, limit: int = 50) -> List[dict]:
@@ -420,6 +509,7 @@ class TaskRepository:
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (task_id, session_id, prompt, project_dir, model, source, now))
         db.commit()
+        bump_history_version()
         
         return {
             "id": task_id,
@@ -452,6 +542,7 @@ class TaskRepository:
             WHERE id = ?
         """, (success, result, duration_ms, num_turns, error, now, session_id, task_id))
         db.commit()
+        bump_history_version()
         
         return self.get_by_id(task_id)
     
@@ -573,6 +664,31 @@ class ChatMessageRepository:
         # Reverse to get chronological order (oldest first for display)
         return list(reversed(messages))
     
+    def get_page_with_total(self, session_id: str, limit: int = 30, offset: int = 0) -> Tuple[List[dict], int]:
+        """
+        Get a page of chat messages (chronological) and the session's total
+        message count in one query.
+        """
+        db = get_db()
+        cursor = db.execute("""
+            SELECT *, COUNT(*) OVER () AS _total FROM chat_messages 
+            WHERE session_id = ? 
+            ORDER BY created_at DESC
+            LIMIT ? OFFSET ?
+        """, (session_id, limit, offset))
+        rows = cursor.fetchall()
+        if not rows:
+            # Offset past the end returns no rows to carry the total
+            return [], self.count_by_session(session_id) if offset else 0
+        
+        total = rows[0]['_total']
+        messages = []
+        for row in reversed(rows):
+            msg = self._parse_message(row)
+            msg.pop('_total', None)
+            messages.append(msg)
+        return messages, total
+    
     def count_by_session(self, session_id: str) -> int:
         """Count total messages for a session"""
         db = get_db()
@@ -659,9 +775,94 @@ _chat_repo: Optional[ChatMessageRepository] = None
 _settings_repo: Optional[SessionSettingsRepository] = None
 
 
+class _PatternSet:
+    """Permission rule patterns pre-split for matching without a rule scan"""
+    __slots__ = ('match_all', 'exact', 'prefixes')
+    
+    def __init__(self, patterns: List[str]):
+        self.match_all = '*' in patterns
+        self.exact = frozenset(p for p in patterns if p != '*' and not p.endswith(' *'))
+        self.prefixes = tuple(p[:-2] for p in patterns if p != '*' and p.endswith(' *'))
+    
+    def matches(self, value: str) -> bool:
+        return (
+            self.match_all
+            or value in self.exact
+            or (bool(self.prefixes) and value.startswith(self.prefixes))
+        )
+
+
+_NO_PATTERNS = _PatternSet([])
+
+
+class _CompiledToolRules:
+    """All rules for one tool, grouped by priority bucket"""
+    __slots__ = ('global_deny', 'global_allow', 'session_deny', 'session_allow')
+    
+    def __init__(self, rules: List[dict]):
+        buckets: Dict[Tuple[str, str, Optional[str]], List[str]] = {}
+        for rule in rules:
+            session_id = rule['session_id'] if rule['scope'] == 'session' else None
+            buckets.setdefault((rule['rule_type'], rule['scope'], session_id), []).append(rule['pattern'])
+        
+        self.global_deny = _PatternSet(buckets.get(('deny', 'global', None), []))
+        self.global_allow = _PatternSet(buckets.get(('allow', 'global', None), []))
+        self.session_deny: Dict[str, _PatternSet] = {}
+        self.session_allow: Dict[str, _PatternSet] = {}
+        for (rule_type, scope, session_id), patterns in buckets.items():
+            if scope != 'session' or not session_id:
+                continue
+            target = self.session_deny if rule_type == 'deny' else self.session_allow
+            target[session_id] = _PatternSet(patterns)
+    
+    def check(self, value: str, session_id: Optional[str]) -> Optional[str]:
+        if self.global_deny.matches(value):
+            return 'deny'
+        if session_id:
+            if self.session_deny.get(session_id, _NO_PATTERNS).matches(value):
+                return 'deny'
+            if self.session_allow.get(session_id, _NO_PATTERNS).matches(value):
+                return 'allow'
+        if self.global_allow.matches(value):
+            return 'allow'
+        return None
+
+
 class PermissionRulesRepository:
     """Repository for permission rules (allow/deny, global/session)"""
     
+    def __init__(self):
+        # tool_name -> compiled rules, rebuilt lazily after any rule change
+        self._compiled: Dict[str, _CompiledToolRules] = {}
+        self._compiled_generation = 0
+        self._compiled_lock = Lock()
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped on every rule change"""
+        return self._compiled_generation
+    
+    def _invalidate_compiled(self):
+        with self._compiled_lock:
+            self._compiled_generation += 1
+            self._compiled.clear()
+    
+    def _get_compiled(self, tool_name: str) -> _CompiledToolRules:
+        compiled = self._compiled.get(tool_name)
+        if compiled is None:
+            generation = self._compiled_generation
+            db = get_db()
+            cursor = db.execute(
+                "SELECT pattern, rule_type, scope, session_id FROM permission_rules WHERE tool_name = ?",
+                (tool_name,)
+            )
+            compiled = _CompiledToolRules([row_to_dict(row) for row in cursor.fetchall()])
+            with self._compiled_lock:
+                # Skip caching if rules changed while we were reading them
+                if generation == self._compiled_generation:
+                    self._compiled[tool_name] = compiled
+        return compiled
+    
     def add(self, tool_name: str, pattern: str, rule_type: str = 'allow', 
             scope: str = 'global', session_id: Optional[str] = None,
             description: Optional[str] = None) -> Optional[dict]:
@@ -673,6 +874,7 @@ class PermissionRulesRepository:
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (tool_name, pattern, rule_type, scope, session_id, description))
             db.commit()
+            self._invalidate_compiled()
             
             cursor = db.execute(
                 "SELECT * FROM permission_rules WHERE tool_name = ? AND pattern = ? AND scope = ? AND (session_id = ? OR (session_id IS NULL AND ? IS NULL))",
@@ -689,6 +891,7 @@ class PermissionRulesRepository:
         db = get_db()
         cursor = db.execute("DELETE FROM permission_rules WHERE id = ?", (rule_id,))
         db.commit()
+        self._invalidate_compiled()
         return cursor.rowcount > 0
     
     def get_all(self, scope: Optional[str] = None) -> List[dict]:
@@ -756,6 +959,7 @@ class PermissionRulesRepository:
             (session_id,)
         )
         db.commit()
+        self._invalidate_compiled()
         return cursor.rowcount
     
     def _get_match_value(self, tool_name: str, tool_input: Dict[str, Any]) -> str:
@@ -799,50 +1003,7 @@ class PermissionRulesRepository:
         4. Global allow rules
         """
         value = self._get_match_value(tool_name, tool_input)
-        
-        # Get all applicable rules
-        db = get_db()
-        if session_id:
-            cursor = db.execute("""
-                SELECT * FROM permission_rules 
-                WHERE tool_name = ? AND (scope = 'global' OR (scope = 'session' AND session_id = ?))
-            """, (tool_name, session_id))
-        else:
-            cursor = db.execute(
-                "SELECT * FROM permission_rules WHERE tool_name = ? AND scope = 'global'",
-                (tool_name,)
-            )
-        rules = [row_to_dict(row) for row in cursor.fetchall()]
-        
-        if not rules:
-            return None
-        
-        # Check in priority order
-        # 1. Global deny
-        for rule in rules:
-            if rule['rule_type'] == 'deny' and rule['scope'] == 'global':
-                if self._matches_pattern(rule['pattern'], value):
-                    return 'deny'
-        
-        # 2. Session deny
-        for rule in rules:
-            if rule['rule_type'] == 'deny' and rule['scope'] == 'session':
-                if self._matches_pattern(rule['pattern'], value):
-                    return 'deny'
-        
-        # 3. Session allow
-        for rule in rules:
-            if rule['rule_type'] == 'allow' and rule['scope'] == 'session':
-                if self._matches_pattern(rule['pattern'], value):
-                    return 'allow'
-        
-        # 4. Global allow
-        for rule in rules:
-            if rule['rule_type'] == 'allow' and rule['scope'] == 'global':
-                if self._matches_pattern(rule['pattern'], value):
-                    return 'allow'
-        
-        return None
+        return self._get_compiled(tool_name).check(value, session_id)
     
     def is_allowed(self, tool_name: str, tool_input: Dict[str, Any], 
                    session_id: Optional[str] = None) -> bool:
@@ -856,16 +1017,53 @@ AllowlistRepository = PermissionRulesRepository
 
 
 class NotificationRepository:
-    """Repository for notifications"""
+    """
+    Repository for notifications.
+    
+    Unread counts (global and per session) are cached in memory and adjusted
+    by the mutating methods, so badge polling does not hit SQLite. Mutations
+    run under the cache lock so a cold-miss COUNT cannot race a write.
+    """
+    
+    def __init__(self):
+        self._lock = Lock()
+        self._unread_count: Optional[int] = None
+        self._session_unread: Dict[str, int] = {}
+    
+    def invalidate_unread_counts(self, session_id: Optional[str] = None):
+        """Drop cached unread counts (e.g. after rows were removed by a cascade)"""
+        with self._lock:
+            self._unread_count = None
+            if session_id is None:
+                self._session_unread.clear()
+            else:
+                self._session_unread.pop(session_id, None)
+    
+    def _get_unread_state(self, db, notification_id: int) -> Optional[tuple]:
+        """(session_id, is_unread) for a notification, or None if it does not exist"""
+        row = db.execute(
+            "SELECT session_id, read FROM notifications WHERE id = ?",
+            (notification_id,)
+        ).fetchone()
+        return (row[0], not row[1]) if row else None
+    
+    def _adjust_unread(self, session_id: str, delta: int):
+        """Apply a change to the cached counts (caller holds the lock)"""
+        if self._unread_count is not None:
+            self._unread_count += delta
+        if session_id in self._session_unread:
+            self._session_unread[session_id] += delta
     
     def create(self, session_id: str, notification_type: str, title: str, message: Optional[str] = None) -> dict:
         """Create a new notification"""
         db = get_db()
-        db.execute("""
-            INSERT INTO notifications (session_id, type, title, message)
-            VALUES (?, ?, ?, ?)
-        """, (session_id, notification_type, title, message))
-        db.commit()
+        with self._lock:
+            db.execute("""
+                INSERT INTO notifications (session_id, type, title, message)
+                VALUES (?, ?, ?, ?)
+            """, (session_id, notification_type, title, message))
+            db.commit()
+            self._adjust_unread(session_id, 1)
         
         cursor = db.execute("SELECT * FROM notifications WHERE id = last_insert_rowid()")
         row = cursor.fetchone()
@@ -897,18 +1095,30 @@ class NotificationRepository:
     
     def get_unread_count(self) -> int:
         """Get count of unread notifications"""
-        db = get_db()
-        cursor = db.execute("SELECT COUNT(*) FROM notifications WHERE read = 0")
-        return cursor.fetchone()[0]
+        count = self._unread_count
+        if count is not None:
+            return count
+        with self._lock:
+            if self._unread_count is None:
+                db = get_db()
+                cursor = db.execute("SELECT COUNT(*) FROM notifications WHERE read = 0")
+                self._unread_count = cursor.fetchone()[0]
+            return self._unread_count
     
     def get_session_unread_count(self, session_id: str) -> int:
         """Get count of unread notifications for a session"""
-        db = get_db()
-        cursor = db.execute(
-            "SELECT COUNT(*) FROM notifications WHERE session_id = ? AND read = 0",
-            (session_id,)
-        )
-        return cursor.fetchone()[0]
+        count = self._session_unread.get(session_id)
+        if count is not None:
+            return count
+        with self._lock:
+            if session_id not in self._session_unread:
+                db = get_db()
+                cursor = db.execute(
+                    "SELECT COUNT(*) FROM notifications WHERE session_id = ? AND read = 0",
+                    (session_id,)
+                )
+                self._session_unread[session_id] = cursor.fetchone()[0]
+            return self._session_unread[session_id]
     
     def get_session_unread_types(self, session_id: str) -> List[str]:
         """Get list of unread notification types for a session (for badges)"""
@@ -922,49 +1132,76 @@ class NotificationRepository:
     def mark_read(self, notification_id: int) -> bool:
         """Mark a notification as read"""
         db = get_db()
-        cursor = db.execute(
-            "UPDATE notifications SET read = 1 WHERE id = ?",
-            (notification_id,)
-        )
-        db.commit()
-        return cursor.rowcount > 0
+        with self._lock:
+            state = self._get_unread_state(db, notification_id)
+            if not state:
+                return False
+            db.execute(
+                "UPDATE notifications SET read = 1 WHERE id = ?",
+                (notification_id,)
+            )
+            db.commit()
+            session_id, was_unread = state
+            if was_unread:
+                self._adjust_unread(session_id, -1)
+        return True
     
     def mark_all_read(self) -> int:
         """Mark all notifications as read"""
         db = get_db()
-        cursor = db.execute("UPDATE notifications SET read = 1 WHERE read = 0")
-        db.commit()
+        with self._lock:
+            cursor = db.execute("UPDATE notifications SET read = 1 WHERE read = 0")
+            db.commit()
+            self._unread_count = 0
+            self._session_unread.clear()
         return cursor.rowcount
     
     def mark_session_read(self, session_id: str) -> int:
         """Mark all notifications for a session as read"""
         db = get_db()
-        cursor = db.execute(
-            "UPDATE notifications SET read = 1 WHERE session_id = ? AND read = 0",
-            (session_id,)
-        )
-        db.commit()
+        with self._lock:
+            cursor = db.execute(
+                "UPDATE notifications SET read = 1 WHERE session_id = ? AND read = 0",
+                (session_id,)
+            )
+            db.commit()
+            if self._unread_count is not None:
+                self._unread_count -= cursor.rowcount
+            self._session_unread[session_id] = 0
         return cursor.rowcount
     
     def delete(self, notification_id: int) -> bool:
         """Delete a notification"""
         db = get_db()
-        cursor = db.execute("DELETE FROM notifications WHERE id = ?", (notification_id,))
-        db.commit()
-        return cursor.rowcount > 0
+        with self._lock:
+            state = self._get_unread_state(db, notification_id)
+            if not state:
+                return False
+            db.execute("DELETE FROM notifications WHERE id = ?", (notification_id,))
+            db.commit()
+            session_id, was_unread = state
+            if was_unread:
+                self._adjust_unread(session_id, -1)
+        return True
     
     def clear_all(self) -> int:
         """Clear all notifications"""
         db = get_db()
-        cursor = db.execute("DELETE FROM notifications")
-        db.commit()
+        with self._lock:
+            cursor = db.execute("DELETE FROM notifications")
+            db.commit()
+            self._unread_count = 0
+            self._session_unread.clear()
         return cursor.rowcount
     
     def clear_by_session(self, session_id: str) -> int:
         """Clear all notifications for a session"""
         db = get_db()
-        cursor = db.execute("DELETE FROM notifications WHERE session_id = ?", (session_id,))
-        db.commit()
+        with self._lock:
+            cursor = db.execute("DELETE FROM notifications WHERE session_id = ?", (session_id,))
+            db.commit()
+            self._unread_count = None
+            self._session_unread[session_id] = 0
         return cursor.rowcount
 
 
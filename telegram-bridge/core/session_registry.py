@@ -5,14 +5,19 @@ SQLite-backed storage with in-memory pending request cache
 import os
 import logging
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from threading import Lock
 
+from pydantic import TypeAdapter
+
 from .models import Session, SessionStatus, ControlState, PendingRequest
-from .repositories import get_session_repo, get_permission_repo, get_queue_repo
+from .repositories import get_session_repo, get_permission_repo, get_queue_repo, get_sessions_version, bump_sessions_version
 
 logger = logging.getLogger(__name__)
 
+# Dumps a whole session list in one pydantic-core call
+_SESSION_LIST_ADAPTER = TypeAdapter(List[Session])
+
 
 class SessionRegistry:
     """
@@ -31,6 +36,19 @@ class SessionRegistry:
     def __init__(self):
         self._pending_requests: Dict[str, PendingRequest] = {}
         self._lock = Lock()
+        # (version, sessions tuple) behind get_all_snapshot()/get_all()
+        self._all_cache: Optional[tuple] = None
+        # (version, JSON-ready dicts) for sessions_update payloads
+        self._dumped_cache: Optional[tuple] = None
+        # (version, number of non-stopped sessions) for health checks
+        self._active_count_cache: Optional[tuple] = None
+        # (version, lower-cased name -> non-stopped session) for get_by_name
+        self._name_index_cache: Optional[tuple] = None
+    
+    @property
+    def version(self) -> int:
+        """Version of session state; changes whenever get_all() output may change"""
+        return get_sessions_version()
     
     def _dict_to_session(self, data: dict) -> Session:
         """Convert database dict to Session model"""
@@ -122,6 +140,7 @@ class SessionRegistry:
             
             # Clear any cached pending request
             self._pending_requests.pop(session_id, None)
+            bump_sessions_version()
             
             session = self._dict_to_session(data)
             logger.info(f"Registered session: {session_id} ({final_name})")
@@ -169,12 +188,17 @@ class SessionRegistry:
         return None
     
     def get_by_name(self, name: str) -> Optional[Session]:
-        """Get a session by name"""
-        repo = get_session_repo()
-        for data in repo.get_all():
-            if data['name'].lower() == name.lower():
-                return self._dict_to_session(data)
-        return None
+        """Get a non-stopped session by name (case-insensitive)"""
+        version = get_sessions_version()
+        cached = self._name_index_cache
+        if cached is None or cached[0] != version:
+            by_name = {}
+            for session in self.get_all_snapshot()[1]:
+                if session.status != SessionStatus.STOPPED:
+                    # Most recently updated session wins, as with the old linear scan
+                    by_name.setdefault(session.name.lower(), session)
+            cached = self._name_index_cache = (version, by_name)
+        return cached[1].get(name.lower())
     
     def get_by_project_dir(self, project_dir: str) -> Optional[Session]:
         """Get a session by project directory"""
@@ -192,16 +216,56 @@ class SessionRegistry:
             return self._dict_to_session(sessions[index - 1])
         return None
     
-    def get_all(self) -> List[Session]:
-        """Get all sessions"""
+    def get_all_snapshot(self) -> Tuple[int, Tuple[Session, ...]]:
+        """
+        (version, sessions) for the current session state, rebuilt only after a
+        change. The tuple is shared between callers; use get_all() for a list.
+        """
+        # Read the version before querying so a concurrent write invalidates the result
+        version = get_sessions_version()
+        cached = self._all_cache
+        if cached is not None and cached[0] == version:
+            return cached
+        
         repo = get_session_repo()
-        return [self._dict_to_session(data) for data in repo.get_all(include_stopped=True)]
+        sessions = tuple(self._dict_to_session(data) for data in repo.get_all(include_stopped=True))
+        cached = self._all_cache = (version, sessions)
+        return cached
+    
+    def get_all(self) -> List[Session]:
+        """Get all sessions (cached until the next session state change)"""
+        return list(self.get_all_snapshot()[1])
+    
+    def get_all_dumped(self) -> List[dict]:
+        """
+        JSON-ready list of all sessions, dumped once per session state version.
+        The list is shared between callers and must not be modified.
+        """
+        version = get_sessions_version()
+        cached = self._dumped_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        dumped = _SESSION_LIST_ADAPTER.dump_python(self.get_all(), mode='json')
+        self._dumped_cache = (version, dumped)
+        return dumped
     
     def get_active_sessions(self) -> List[Session]:
         """Get all non-stopped sessions"""
         repo = get_session_repo()
         return [self._dict_to_session(data) for data in repo.get_all(include_stopped=False)]
     
+    def active_session_count(self) -> int:
+        """Number of non-stopped sessions, counted once per session state version"""
+        version = get_sessions_version()
+        cached = self._active_count_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        count = sum(1 for s in self.get_all_snapshot()[1] if s.status != SessionStatus.STOPPED)
+        self._active_count_cache = (version, count)
+        return count
+    
     def get_waiting_sessions(self) -> List[Session]:
         """Get all waiting sessions"""
         repo = get_session_repo()
@@ -223,6 +287,7 @@ class SessionRegistry:
                     self._pending_requests[session_id] = pending_request
                 else:
                     self._pending_requests.pop(session_id, None)
+            bump_sessions_version()
         
         # Map model fields to database fields
         db_kwargs = {}
@@ -240,25 +305,57 @@ class SessionRegistry:
             return self._dict_to_session(data)
         return None
     
-    def update_status(self, session_id: str, status: SessionStatus) -> Optional[Session]:
-        """Update session status and sync control_state"""
+    def update_status(
+        self,
+        session_id: str,
+        status: SessionStatus,
+        clear_pending: bool = False
+    ) -> Optional[Session]:
+        """Update session status and sync control_state (optionally clearing the pending request)"""
         repo = get_session_repo()
         status_str = status.value if isinstance(status, SessionStatus) else status
-        data = repo.update_status(session_id, status_str)
-        if data:
-            # Sync control_state with status
-            if status_str == 'waiting':
-                self.update_control_state(session_id, ControlState.CLI_WAITING)
-            elif status_str == 'running':
-                # Only set to cli_active if not already remote_active
-                current = self.get(session_id)
-                if current and current.control_state != ControlState.REMOTE_ACTIVE:
-                    self.update_control_state(session_id, ControlState.CLI_ACTIVE)
-            # Re-fetch after control_state update
-            data = repo.get_by_id(session_id)
-        if data:
+        dropped_pending = False
+        if clear_pending or status_str == 'stopped':
+            # Answered, or a stopped CLI can no longer answer; drop the cached pending request
+            with self._lock:
+                dropped_pending = self._pending_requests.pop(session_id, None) is not None
+        
+        data = repo.get_by_id(session_id)
+        if not data:
+            return None
+        
+        # Sync control_state with status
+        control_state = data.get('control_state')
+        if status_str == 'waiting':
+            control_state = ControlState.CLI_WAITING.value
+        elif status_str == 'running' and control_state != ControlState.REMOTE_ACTIVE.value:
+            # Only set to cli_active if not already remote_active
+            control_state = ControlState.CLI_ACTIVE.value
+        
+        if data.get('status') == status_str and data.get('control_state') == control_state:
+            # Already in this state: skip the writes, the status event and the
+            # session version bump (and with it the sessions_update rebuild)
+            if dropped_pending:
+                bump_sessions_version()
             return self._dict_to_session(data)
-        return None
+        
+        if data.get('status') != status_str:
+            data = repo.update_status(session_id, status_str) or data
+        if data.get('control_state') != control_state:
+            data = repo.update_control_state(session_id, control_state) or data
+            logger.info(f"Session {session_id} control state changed to {control_state}")
+        return self._dict_to_session(data)
+    
+    def stop_sessions(self, session_ids: List[str]) -> int:
+        """Mark several sessions stopped in one write; returns how many changed"""
+        with self._lock:
+            dropped_pending = [self._pending_requests.pop(sid, None) for sid in session_ids]
+        
+        # control_state is not synced for 'stopped' (see update_status)
+        changed = get_session_repo().bulk_update_status(session_ids, SessionStatus.STOPPED.value)
+        if not changed and any(dropped_pending):
+            bump_sessions_version()
+        return len(changed)
     
     def set_pending_request(
         self,
@@ -269,20 +366,23 @@ class SessionRegistry:
         with self._lock:
             if pending_request:
                 self._pending_requests[session_id] = pending_request
-                
-                # Also store in database for permission requests
-                if pending_request.type == 'permission' or pending_request.tool_name:
-                    perm_repo = get_permission_repo()
-                    perm_repo.create(
-                        session_id=session_id,
-                        message=pending_request.message,
-                        tool_name=pending_request.tool_name,
-                        tool_input=pending_request.tool_input,
-                        request_id=pending_request.id,
-                        telegram_message_id=pending_request.telegram_message_id
-                    )
+                changed = True
             else:
-                self._pending_requests.pop(session_id, None)
+                changed = self._pending_requests.pop(session_id, None) is not None
+        
+        # Also store in database for permission requests (outside the lock; the
+        # insert bumps the session version itself, so skip the second bump)
+        if pending_request and (pending_request.type == 'permission' or pending_request.tool_name):
+            get_permission_repo().create(
+                session_id=session_id,
+                message=pending_request.message,
+                tool_name=pending_request.tool_name,
+                tool_input=pending_request.tool_input,
+                request_id=pending_request.id,
+                telegram_message_id=pending_request.telegram_message_id
+            )
+        elif changed:
+            bump_sessions_version()
         
         return self.get(session_id)
     
@@ -291,6 +391,7 @@ class SessionRegistry:
         repo = get_session_repo()
         with self._lock:
             self._pending_requests.pop(session_id, None)
+        bump_sessions_version()
         
         if repo.delete(session_id):
             logger.info(f"Removed session: {session_id}")
@@ -419,6 +520,10 @@ class SessionRegistry:
         queue_repo = get_queue_repo()
         return queue_repo.count_pending(session_id)
     
+    def get_queue_counts(self) -> Dict[str, int]:
+        """Get pending message counts for all sessions in one query (missing = 0)"""
+        return get_queue_repo().count_pending_by_session()
+    
     def should_queue_message(self, session_id: str) -> bool:
         """Check if incoming message should be queued (CLI is active)"""
         session = self.get(session_id)
@@ -27,7 +27,7 @@ else:
     load_dotenv(override=True)  # Fallback to telegram-bridge/.env
 
 from bot.telegram_bot import TelegramBotManager
-from api.routes import web_router, hooks_router
+from api.routes import web_router, hooks_router, set_sio, set_bot_manager
 from api.socketio_handlers import create_socketio_server, create_socketio_app
 from api.auth import verify_token, verify_api_key, PUBLIC_ROUTES, log_auth_config
 from core.session_registry import session_registry
@@ -49,6 +49,8 @@ async def lifespan(app: FastAPI):
     
     # Startup
     logger.info("Starting Telegram-Droid Bridge Server...")
+    # uvicorn uses uvloop when it is installed; log which loop actually runs
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
     
     # Log auth config for debugging
     log_auth_config()
@@ -76,6 +78,7 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize Telegram bot: {e}")
         bot_manager = None
+    set_bot_manager(bot_manager)
     
     logger.info("Bridge server started successfully")
     
@@ -83,6 +86,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down...")
+    set_bot_manager(None)
     if bot_manager:
         await bot_manager.stop()
     
@@ -172,6 +176,7 @@ app.include_router(hooks_router)
 # Create Socket.IO server
 sio = create_socketio_server()
 app.state.sio = sio
+set_sio(sio)
 
 # Make bot_manager available to routes
 app.state.bot_manager = lambda: bot_manager
@@ -234,6 +239,9 @@ def main():
         host=host,
         port=port,
         log_config=log_config,
+        # Large broadcasts are deflated once in api.event_bus; per-message
+        # deflate would recompress every frame separately for each client
+        ws_per_message_deflate=False,
     )
 
 
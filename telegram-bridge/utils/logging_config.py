@@ -61,6 +61,8 @@ def setup_logging(
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
     logging.getLogger("telegram").setLevel(logging.WARNING)
+    logging.getLogger("socketio").setLevel(logging.WARNING)
+    logging.getLogger("engineio").setLevel(logging.WARNING)
     
     # Configure uvicorn loggers to use our formatter with timestamps
     for uvicorn_logger_name in ["uvicorn", "uvicorn.error", "uvicorn.access"]:
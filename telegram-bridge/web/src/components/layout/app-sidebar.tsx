@@ -5,7 +5,7 @@ import Link from 'next/link'
 import { useRouter } from 'next/navigation'
 import { Terminal, Menu, Plus, ShieldCheck, X, Trash2, Pencil, Settings, LogOut, Clock, ChevronDown, ChevronRight, Brain, AlertTriangle, CheckCircle, Cog } from 'lucide-react'
 import { cn, formatRelativeTime } from '@/lib/utils'
-import { getSocket } from '@/lib/socket'
+import { getSocket, mergeSession } from '@/lib/socket'
 import { getAuthHeaders } from '@/lib/api'
 import { useAuth } from '@/contexts/auth-context'
 import { AddSessionModal } from '@/components/sessions/add-session-modal'
@@ -109,6 +109,11 @@ export function AppSidebar({ currentPath }: AppSidebarProps) {
       setSessions(sortSessions(updatedSessions))
     }
     
+    // Single-session delta (e.g. a permission request answered)
+    const handleSessionChanged = (updated: Session) => {
+      setSessions(prev => sortSessions(mergeSession(prev, updated)))
+    }
+    
     const handleTaskCompleted = () => {
       // Refetch sessions when a task completes (updates last_activity)
       fetchSessions()
@@ -136,9 +141,10 @@ export function AppSidebar({ currentPath }: AppSidebarProps) {
     }
     
     socket.on('sessions_update', handleSessionsUpdate)
+    socket.on('session_changed', handleSessionChanged)
     socket.on('task_completed', handleTaskCompleted)
     socket.on('chat_updated', handleChatUpdated)
-    socket.on('queue_updated', handleQueueUpdated)
+    socket.on('queue_changed', handleQueueUpdated)
     socket.on('connect', handleConnect)
     socket.on('notification', handleNotification)
     
@@ -147,9 +153,10 @@ export function AppSidebar({ currentPath }: AppSidebarProps) {
 
     return () => {
       socket.off('sessions_update', handleSessionsUpdate)
+      socket.off('session_changed', handleSessionChanged)
       socket.off('task_completed', handleTaskCompleted)
       socket.off('chat_updated', handleChatUpdated)
-      socket.off('queue_updated', handleQueueUpdated)
+      socket.off('queue_changed', handleQueueUpdated)
       socket.off('connect', handleConnect)
       socket.off('notification', handleNotification)
       socket.io.off('reconnect', handleConnect)
@@ -145,9 +145,18 @@ export function PageLayout({ children, title, session, currentPath }: PageLayout
       }
     }
     
+    const handleSessionChanged = (updated: Session) => {
+      if (updated.id === session.id) {
+        setSessionName(updated.name)
+        setLocalControlState(updated.control_state)
+      }
+    }
+    
     socket.on('sessions_update', handleSessionsUpdate)
+    socket.on('session_changed', handleSessionChanged)
     return () => {
       socket.off('sessions_update', handleSessionsUpdate)
+      socket.off('session_changed', handleSessionChanged)
     }
   }, [session?.id, session])
 
@@ -172,6 +172,22 @@ export function SessionCard({ session }: SessionCardProps) {
     setPendingRequest(session.pending_request)
   }, [session.pending_request])
 
+  // Join this session's room for session-scoped events (task activity, CLI thinking).
+  // Rooms are per connection, so re-join after every reconnect.
+  useEffect(() => {
+    const socket = getSocket()
+    const subscribe = () => {
+      socket.emit('subscribe', { sessionId: session.id })
+    }
+
+    if (socket.connected) subscribe()
+    socket.on('connect', subscribe)
+    return () => {
+      socket.off('connect', subscribe)
+      socket.emit('unsubscribe', { sessionId: session.id })
+    }
+  }, [session.id])
+
   // Listen for sessions_update to get real-time pending_request updates
   useEffect(() => {
     const socket = getSocket()
@@ -183,9 +199,18 @@ export function SessionCard({ session }: SessionCardProps) {
       }
     }
     
+    // Single-session delta sent as soon as a request is answered
+    const handleSessionChanged = (updated: Session) => {
+      if (updated.id === session.id) {
+        setPendingRequest(updated.pending_request)
+      }
+    }
+    
     socket.on('sessions_update', handleSessionsUpdate)
+    socket.on('session_changed', handleSessionChanged)
     return () => {
       socket.off('sessions_update', handleSessionsUpdate)
+      socket.off('session_changed', handleSessionChanged)
     }
   }, [session.id])
 
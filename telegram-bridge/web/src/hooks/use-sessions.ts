@@ -3,7 +3,7 @@
 import { useQuery, useQueryClient } from '@tanstack/react-query'
 import { useEffect } from 'react'
 import { apiClient } from '@/lib/api-client'
-import { getSocket } from '@/lib/socket'
+import { getSocket, mergeSession } from '@/lib/socket'
 import type { Session } from '@/types'
 
 const SESSIONS_QUERY_KEY = ['sessions'] as const
@@ -27,10 +27,16 @@ export function useSessions() {
       queryClient.setQueryData(SESSIONS_QUERY_KEY, sessions)
     }
 
+    const handleSessionChanged = (session: Session) => {
+      queryClient.setQueryData<Session[]>(SESSIONS_QUERY_KEY, (old) => mergeSession(old ?? [], session))
+    }
+
     socket.on('sessions_update', handleSessionsUpdate)
+    socket.on('session_changed', handleSessionChanged)
 
     return () => {
       socket.off('sessions_update', handleSessionsUpdate)
+      socket.off('session_changed', handleSessionChanged)
     }
   }, [queryClient])
 
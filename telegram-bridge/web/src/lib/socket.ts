@@ -14,8 +14,20 @@ interface ActivityEvent {
   isError?: boolean
 }
 
+type ServerEventName = Exclude<keyof ServerToClientEvents, 'batch'>
+
+// Server coalesces broadcasts into one frame: [{ event, data }, ...].
+// Large snapshots arrive as zlib-deflated JSON in `z` instead of `data`.
+interface BatchedEvent {
+  event: ServerEventName
+  data?: unknown
+  z?: ArrayBuffer
+}
+
 interface ServerToClientEvents {
+  batch: (events: BatchedEvent[]) => void
   sessions_update: (sessions: Session[]) => void
+  session_changed: (session: Session) => void
   notification: (notification: Notification) => void
   session_status: (data: { sessionId: string; status: string }) => void
   response_delivered: (data: { sessionId: string; requestId: string }) => void
@@ -27,6 +39,7 @@ interface ServerToClientEvents {
   cli_thinking: (data: { session_id: string; prompt: string }) => void
   cli_thinking_done: (data: { session_id: string }) => void
   queue_updated: (data: { session_id: string; queue: QueuedMessage[] }) => void
+  queue_changed: (data: { session_id: string }) => void
 }
 
 interface ClientToServerEvents {
@@ -69,11 +82,34 @@ export function getSocket(): TypedSocket {
     socket.on('connect_error', (error) => {
       console.log('[Socket] Connection error:', error.message)
     })
+
+    // Unpack batched frames and dispatch each event to its regular listeners.
+    // Batches are chained so inflating one never reorders it after the next.
+    let pendingBatches: Promise<void> = Promise.resolve()
+    socket.on('batch', (events) => {
+      pendingBatches = pendingBatches
+        .then(() => dispatchBatch(events))
+        .catch((error) => console.error('[Socket] Failed to dispatch batch:', error))
+    })
   }
 
   return socket
 }
 
+async function inflateJson(compressed: ArrayBuffer): Promise<unknown> {
+  const stream = new Blob([compressed]).stream().pipeThrough(new DecompressionStream('deflate'))
+  return JSON.parse(await new Response(stream).text())
+}
+
+async function dispatchBatch(events: BatchedEvent[]): Promise<void> {
+  for (const { event, data, z } of events) {
+    const payload = z ? await inflateJson(z) : data
+    for (const listener of socket?.listeners(event) ?? []) {
+      (listener as (payload: unknown) => void)(payload)
+    }
+  }
+}
+
 export function connectSocket(): Promise<void> {
   return new Promise((resolve, reject) => {
     const sock = getSocket()
@@ -108,6 +144,17 @@ export function connectSocket(): Promise<void> {
   })
 }
 
+// Apply a session_changed delta to a session list (appended if not listed yet)
+export function mergeSession(sessions: Session[], updated: Session): Session[] {
+  const index = sessions.findIndex(s => s.id === updated.id)
+  if (index === -1) {
+    return [...sessions, updated]
+  }
+  const next = [...sessions]
+  next[index] = updated
+  return next
+}
+
 export function disconnectSocket(): void {
   if (socket) {
     socket.disconnect()
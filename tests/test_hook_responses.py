@@ -0,0 +1,97 @@
+"""
+Hook API Tests: batched stored-response query (POST /hooks/responses/query)
+"""
+import sys
+sys.stdout.reconfigure(encoding='utf-8')
+
+import os
+
+BRIDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "telegram-bridge")
+sys.path.insert(0, BRIDGE_DIR)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import hooks_router
+from core.message_queue import message_queue
+
+app = FastAPI()
+app.include_router(hooks_router)
+client = TestClient(app)
+
+
+def query(pairs: list) -> dict:
+    response = client.post("/hooks/responses/query", json={"pairs": pairs})
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+    return response.json()["responses"]
+
+
+def test_query_hit_and_miss():
+    """Test H.1: stored responses are returned, unknown pairs come back null"""
+    print("Test H.1: Response query hit and miss...")
+    message_queue.deliver_response("query-s1", "req-1", "approve")
+
+    responses = query([["query-s1", "req-1"], ["query-s1", "req-unknown"], ["query-nobody", "req-1"]])
+    assert responses == {
+        "query-s1:req-1": "approve",
+        "query-s1:req-unknown": None,
+        "query-nobody:req-1": None,
+    }, f"Unexpected responses: {responses}"
+
+    print("  ✅ Hits and misses reported per pair")
+    return True
+
+
+def test_query_consumes_hit():
+    """Test H.2: a returned response is consumed and not returned again"""
+    print("Test H.2: Response query consumes hits...")
+    message_queue.deliver_response("query-s2", "req-1", "deny")
+
+    assert query([["query-s2", "req-1"]]) == {"query-s2:req-1": "deny"}
+    assert query([["query-s2", "req-1"]]) == {"query-s2:req-1": None}
+
+    print("  ✅ A response is handed out once")
+    return True
+
+
+def test_query_duplicate_pair():
+    """Test H.3: a pair listed twice still gets its stored response"""
+    print("Test H.3: Response query with a duplicate pair...")
+    message_queue.deliver_response("query-s3", "req-1", "yes")
+
+    responses = query([["query-s3", "req-1"], ["query-s3", "req-1"]])
+    assert responses == {"query-s3:req-1": "yes"}, f"Response lost for duplicate pair: {responses}"
+    assert query([["query-s3", "req-1"]]) == {"query-s3:req-1": None}
+
+    print("  ✅ Duplicate pairs do not drop the response")
+    return True
+
+
+def run_all_tests():
+    print("\n" + "="*50)
+    print("HOOK API: Response query")
+    print("="*50 + "\n")
+
+    tests = [
+        test_query_hit_and_miss,
+        test_query_consumes_hit,
+        test_query_duplicate_pair,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"  ❌ FAILED: {e!r}")
+
+    print(f"\n{'='*50}")
+    print(f"Results: {passed}/{len(tests)} tests passed")
+    print("="*50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    run_all_tests()
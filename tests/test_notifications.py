@@ -0,0 +1,131 @@
+"""
+Repository Tests: notification unread counters
+"""
+import sys
+sys.stdout.reconfigure(encoding='utf-8')
+
+import os
+import tempfile
+from pathlib import Path
+
+BRIDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "telegram-bridge")
+sys.path.insert(0, BRIDGE_DIR)
+
+from core import repositories
+from core.database import Database
+from core.repositories import SessionRepository, get_db, get_notification_repo
+
+
+def fresh_db() -> Path:
+    """Point the Database singleton at an empty temporary file"""
+    db_path = Path(tempfile.mkdtemp()) / "test.db"
+    Database.reset_instance()
+    Database.get_instance(db_path)
+    repositories._notification_repo = None
+    return db_path
+
+
+def create_session(session_id: str):
+    SessionRepository().create(session_id, session_id, f"/projects/{session_id}")
+
+
+def db_unread_count(session_id: str = None) -> int:
+    """Unread count straight from SQLite, bypassing the repository cache"""
+    if session_id:
+        row = get_db().execute(
+            "SELECT COUNT(*) FROM notifications WHERE session_id = ? AND read = 0", (session_id,)
+        ).fetchone()
+    else:
+        row = get_db().execute("SELECT COUNT(*) FROM notifications WHERE read = 0").fetchone()
+    return row[0]
+
+
+def test_notification_unread_counts():
+    """Test N.1: cached unread counters track create, mark_read and clear_by_session"""
+    print("Test N.1: Notification unread counters...")
+    fresh_db()
+    create_session("s1")
+    create_session("s2")
+    notifications = get_notification_repo()
+
+    # Prime the caches so the counters are adjusted rather than recounted
+    assert notifications.get_unread_count() == 0
+    assert notifications.get_session_unread_count("s1") == 0
+
+    first = notifications.create("s1", "task_completed", "s1", "one")
+    notifications.create("s1", "task_failed", "s1", "two")
+    notifications.create("s2", "cli_waiting", "s2", "three")
+    assert notifications.get_unread_count() == 3 == db_unread_count()
+    assert notifications.get_session_unread_count("s1") == 2 == db_unread_count("s1")
+    assert notifications.get_session_unread_count("s2") == 1 == db_unread_count("s2")
+
+    assert notifications.mark_read(first["id"])
+    assert notifications.get_unread_count() == 2 == db_unread_count()
+    assert notifications.get_session_unread_count("s1") == 1 == db_unread_count("s1")
+
+    # Marking an already-read row again must not decrement twice
+    assert notifications.mark_read(first["id"])
+    assert notifications.get_unread_count() == 2 == db_unread_count()
+    assert notifications.get_session_unread_count("s1") == 1 == db_unread_count("s1")
+    assert not notifications.mark_read(999999)
+
+    assert notifications.clear_by_session("s1") == 2
+    assert notifications.get_unread_count() == 1 == db_unread_count()
+    assert notifications.get_session_unread_count("s1") == 0 == db_unread_count("s1")
+    assert notifications.get_session_unread_count("s2") == 1 == db_unread_count("s2")
+
+    print("  ✅ Unread counters match the database")
+    return True
+
+
+def test_notification_cascade_delete():
+    """Test N.2: deleting a session drops its notifications from the counters"""
+    print("Test N.2: Notification counters after session delete...")
+    fresh_db()
+    create_session("s1")
+    create_session("s2")
+    notifications = get_notification_repo()
+
+    notifications.create("s1", "task_completed", "s1")
+    notifications.create("s1", "task_completed", "s1")
+    notifications.create("s2", "task_completed", "s2")
+    assert notifications.get_unread_count() == 3
+    assert notifications.get_session_unread_count("s1") == 2
+
+    # Rows go through ON DELETE CASCADE, not the notification repository
+    assert SessionRepository().delete("s1")
+    assert notifications.get_unread_count() == 1 == db_unread_count()
+    assert notifications.get_session_unread_count("s1") == 0 == db_unread_count("s1")
+    assert notifications.get_session_unread_count("s2") == 1 == db_unread_count("s2")
+
+    print("  ✅ Cascade-deleted notifications leave the counters")
+    return True
+
+
+def run_all_tests():
+    print("\n" + "="*50)
+    print("REPOSITORIES: Notifications")
+    print("="*50 + "\n")
+
+    tests = [
+        test_notification_unread_counts,
+        test_notification_cascade_delete,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"  ❌ FAILED: {e!r}")
+
+    print(f"\n{'='*50}")
+    print(f"Results: {passed}/{len(tests)} tests passed")
+    print("="*50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    run_all_tests()
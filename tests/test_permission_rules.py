@@ -0,0 +1,139 @@
+"""
+Repository Tests: permission rule matching
+"""
+import sys
+sys.stdout.reconfigure(encoding='utf-8')
+
+import os
+import tempfile
+from pathlib import Path
+
+BRIDGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "telegram-bridge")
+sys.path.insert(0, BRIDGE_DIR)
+
+from core.database import Database
+from core.repositories import PermissionRulesRepository
+
+
+def fresh_db() -> Path:
+    """Point the Database singleton at an empty temporary file"""
+    db_path = Path(tempfile.mkdtemp()) / "test.db"
+    Database.reset_instance()
+    Database.get_instance(db_path)
+    return db_path
+
+
+def test_permission_precedence():
+    """Test P.1: global deny > session deny > session allow > global allow"""
+    print("Test P.1: Permission rule precedence...")
+    fresh_db()
+    rules = PermissionRulesRepository()
+
+    rules.add("Execute", "*", rule_type="allow", scope="global")
+    rules.add("Execute", "sudo *", rule_type="deny", scope="global")
+    rules.add("Execute", "sudo ls", rule_type="allow", scope="session", session_id="s1")
+    rules.add("Execute", "rm *", rule_type="deny", scope="session", session_id="s1")
+    rules.add("Execute", "rm -rf build", rule_type="allow", scope="session", session_id="s1")
+
+    check = rules.check_permission
+    # Global deny wins over a matching session allow
+    assert check("Execute", {"command": "sudo ls"}, "s1") == "deny"
+    # Session deny wins over session allow and global allow
+    assert check("Execute", {"command": "rm -rf build"}, "s1") == "deny"
+    # Session rules only apply to their own session
+    assert check("Execute", {"command": "rm -rf build"}, "s2") == "allow"
+    assert check("Execute", {"command": "rm -rf build"}, None) == "allow"
+    # Global allow is the fallback
+    assert check("Execute", {"command": "ls"}, "s1") == "allow"
+
+    # Session allow applies where no global allow exists
+    rules.add("Read", "/etc/hosts", rule_type="allow", scope="session", session_id="s1")
+    assert check("Read", {"file_path": "/etc/hosts"}, "s1") == "allow"
+    assert check("Read", {"file_path": "/etc/hosts"}, "s2") is None
+
+    print("  ✅ Rules apply in priority order")
+    return True
+
+
+def test_permission_patterns():
+    """Test P.2: exact, 'prefix *' and '*' patterns"""
+    print("Test P.2: Permission rule patterns...")
+    fresh_db()
+    rules = PermissionRulesRepository()
+
+    rules.add("Read", "/src/app.py", rule_type="allow")
+    rules.add("Edit", "/src *", rule_type="allow")
+    rules.add("Grep", "*", rule_type="deny")
+
+    check = rules.check_permission
+    # Exact pattern matches only the exact value
+    assert check("Read", {"file_path": "/src/app.py"}) == "allow"
+    assert check("Read", {"file_path": "/src/app.py.bak"}) is None
+    assert check("Read", {"file_path": "/src"}) is None
+    # 'prefix *' matches anything starting with the prefix
+    assert check("Edit", {"file_path": "/src/app.py"}) == "allow"
+    assert check("Edit", {"file_path": "/src"}) == "allow"
+    assert check("Edit", {"file_path": "/lib/app.py"}) is None
+    # '*' matches everything for its tool, and nothing for other tools
+    assert check("Grep", {"pattern": "anything"}) == "deny"
+    assert check("Grep", {"pattern": ""}) == "deny"
+    assert check("Execute", {"command": "anything"}) is None
+
+    print("  ✅ Exact, prefix and wildcard patterns match as expected")
+    return True
+
+
+def test_permission_rule_changes_visible():
+    """Test P.3: added and removed rules are seen by the next check"""
+    print("Test P.3: Permission rule cache invalidation...")
+    fresh_db()
+    rules = PermissionRulesRepository()
+
+    tool_input = {"command": "npm test"}
+    assert rules.check_permission("Execute", tool_input, "s1") is None
+
+    rule = rules.add("Execute", "npm *", rule_type="allow")
+    assert rule is not None
+    assert rules.check_permission("Execute", tool_input, "s1") == "allow"
+
+    rules.add("Execute", "npm test", rule_type="deny", scope="session", session_id="s1")
+    assert rules.check_permission("Execute", tool_input, "s1") == "deny"
+
+    assert rules.clear_session_rules("s1") == 1
+    assert rules.check_permission("Execute", tool_input, "s1") == "allow"
+
+    assert rules.remove(rule["id"])
+    assert rules.check_permission("Execute", tool_input, "s1") is None
+
+    print("  ✅ Rule changes take effect on the next check")
+    return True
+
+
+def run_all_tests():
+    print("\n" + "="*50)
+    print("REPOSITORIES: Permission rules")
+    print("="*50 + "\n")
+
+    tests = [
+        test_permission_precedence,
+        test_permission_patterns,
+        test_permission_rule_changes_visible,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except Exception as e:
+            print(f"  ❌ FAILED: {e!r}")
+
+    print(f"\n{'='*50}")
+    print(f"Results: {passed}/{len(tests)} tests passed")
+    print("="*50)
+
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    run_all_tests()